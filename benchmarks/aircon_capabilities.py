@@ -0,0 +1,72 @@
+"""Compare what NatureRemoAC derives from the aircon range on each refresh:
+filtering and converting the temperature lists every time vs. looking up a
+table compiled once.
+
+Run from the repository root:
+
+    python -m benchmarks.aircon_capabilities
+"""
+import timeit
+
+from custom_components.hacs_nature_remo.api.records import load_appliances
+from custom_components.hacs_nature_remo.climate.capabilities import (
+    NO_CAPABILITIES,
+    compile_modes,
+)
+
+from tests.payloads import appliances_json
+
+SIZES = (10, 50, 100)
+NUMBER = 200
+
+
+def temp_range_list(modes, mode: str):
+    if mode in modes:
+        return list(map(float, filter(None, modes.get(mode).temp)))
+    return []
+
+
+def derive(modes, mode: str):
+    # What _update did: the step and the range each filter the list again.
+    temps = temp_range_list(modes, mode)
+    step = 1
+    if len(temps) >= 2 and round(temps[1] - temps[0], 1) in (1.0, 0.5):
+        step = round(temps[1] - temps[0], 1)
+    temps = temp_range_list(modes, mode)
+    value = modes.get(mode)
+    return (
+        min(temps) if temps else 0,
+        max(temps) if temps else 0,
+        step,
+        list(value.vol),
+        list(value.dir),
+    )
+
+
+def look_up(capabilities, mode: str):
+    c = capabilities.get(mode, NO_CAPABILITIES)
+    return c.min_temp, c.max_temp, c.step, list(c.fan_modes), list(c.swing_modes)
+
+
+def main():
+    print(f"{'ACs':>5} {'derive (us)':>12} {'table (us)':>11} {'speedup':>8}")
+    for size in SIZES:
+        appliances = load_appliances(appliances_json(size))
+        modes = [(x.aircon_modes, x.settings.mode) for x in appliances]
+        tables = [(compile_modes(m), mode) for m, mode in modes]
+
+        def derived():
+            for m, mode in modes:
+                derive(m, mode)
+
+        def looked_up():
+            for t, mode in tables:
+                look_up(t, mode)
+
+        t_derive = min(timeit.repeat(derived, number=NUMBER, repeat=3)) / NUMBER * 1e6
+        t_table = min(timeit.repeat(looked_up, number=NUMBER, repeat=3)) / NUMBER * 1e6
+        print(f"{size:>5} {t_derive:>12.1f} {t_table:>11.1f} {t_derive / t_table:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
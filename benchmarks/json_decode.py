@@ -0,0 +1,34 @@
+"""Compare parsing the appliance list with json and orjson.
+
+Run from the repository root:
+
+    python -m benchmarks.json_decode
+"""
+import json
+import timeit
+
+from tests.payloads import appliances_json
+
+SIZES = (30, 100, 300)
+NUMBER = 20
+
+
+def main():
+    try:
+        import orjson
+    except ImportError:
+        print("orjson is not installed")
+        return
+    print(f"{'appliances':>10} {'body (kB)':>10} {'json (ms)':>10} {'orjson (ms)':>12} {'speedup':>8}")
+    for size in SIZES:
+        body = json.dumps(appliances_json(size)).encode()
+        t_json = min(timeit.repeat(lambda: json.loads(body), number=NUMBER, repeat=3)) / NUMBER * 1000
+        t_orjson = min(timeit.repeat(lambda: orjson.loads(body), number=NUMBER, repeat=3)) / NUMBER * 1000
+        print(
+            f"{size:>10} {len(body) / 1000:>10.0f} {t_json:>10.3f} "
+            f"{t_orjson:>12.3f} {t_json / t_orjson:>7.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Compare command latency on a session shared with other integrations vs. a
+dedicated one, against local fake servers with injected latency.
+
+The shared session has Home Assistant's defaults (100 connections for all
+hosts) while other integrations keep it busy with slow requests.
+
+Run from the repository root:
+
+    python -m benchmarks.session_latency
+"""
+import asyncio
+import random
+import statistics
+import time
+
+import aiohttp
+from aiohttp import web
+
+from custom_components.hacs_nature_remo.api import NatureRemoAPIVer1
+from custom_components.hacs_nature_remo.api.wrapper import (
+    AioHttpWrapper,
+    create_session,
+)
+
+COMMANDS = 400
+# Requests other integrations keep in flight.
+BACKGROUND = 120
+REMO_LATENCY = 0.02
+OTHER_LATENCY = 0.5
+
+
+async def start_server(handler) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+
+def server_url(runner: web.AppRunner) -> str:
+    host, port = runner.addresses[0][:2]
+    return f"http://{host}:{port}"
+
+
+async def remo(request):
+    await asyncio.sleep(random.gauss(REMO_LATENCY, REMO_LATENCY / 4))
+    return web.json_response({})
+
+
+async def other(request):
+    await asyncio.sleep(OTHER_LATENCY)
+    return web.Response(text="ok")
+
+
+async def background_load(session: aiohttp.ClientSession, url: str, stop: asyncio.Event):
+    async def worker():
+        while not stop.is_set():
+            async with session.get(url) as resp:
+                await resp.read()
+
+    await asyncio.gather(*(worker() for _ in range(BACKGROUND)))
+
+
+async def measure(session: aiohttp.ClientSession, url: str):
+    api = NatureRemoAPIVer1(AioHttpWrapper(session), "token")
+    api.base_url = url
+
+    async def command(i):
+        start = time.perf_counter()
+        await api.send_signal(f"signal-{i}")
+        return time.perf_counter() - start
+
+    # A few commands at a time, like automations turning on a scene.
+    latencies = []
+    for start in range(0, COMMANDS, 4):
+        latencies += await asyncio.gather(*(command(i) for i in range(start, start + 4)))
+    percentiles = statistics.quantiles(latencies, n=100)
+    return percentiles[49] * 1000, percentiles[98] * 1000
+
+
+async def run():
+    remo_server = await start_server(remo)
+    other_server = await start_server(other)
+    remo_url, other_url = server_url(remo_server), server_url(other_server)
+    shared = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=100))
+    dedicated = create_session(connect_timeout=5, read_timeout=10)
+    stop = asyncio.Event()
+    load = asyncio.ensure_future(background_load(shared, other_url, stop))
+    await asyncio.sleep(OTHER_LATENCY)
+    try:
+        print(f"{'session':>10} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+        for name, session in (("shared", shared), ("dedicated", dedicated)):
+            p50, p99 = await measure(session, remo_url)
+            print(f"{name:>10} {p50:>9.1f} {p99:>9.1f}")
+    finally:
+        stop.set()
+        await load
+        await shared.close()
+        await dedicated.close()
+        await remo_server.cleanup()
+        await other_server.cleanup()
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
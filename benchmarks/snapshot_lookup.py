@@ -0,0 +1,42 @@
+"""Compare per-refresh entity lookups: find_by scans vs. an id-indexed Snapshot.
+
+Run from the repository root:
+
+    python -m benchmarks.snapshot_lookup
+"""
+import timeit
+
+from remo.models import ApplianceSchema
+
+from custom_components.hacs_nature_remo.snapshot import Snapshot
+from custom_components.hacs_nature_remo.utils import find_by
+
+from tests.payloads import appliances_json
+
+SIZES = (100, 300, 600)
+NUMBER = 20
+
+
+def main():
+    print(f"{'appliances':>10} {'find_by (ms)':>13} {'snapshot (ms)':>14} {'speedup':>8}")
+    for size in SIZES:
+        appliances = ApplianceSchema(many=True).load(appliances_json(size))
+        ids = [x.id for x in appliances]
+
+        def scan():
+            # every entity looks itself up in the fresh list
+            for _id in ids:
+                find_by(appliances, "id", _id)
+
+        def indexed():
+            snapshot = Snapshot.build(appliances)
+            for _id in ids:
+                snapshot.get(_id)
+
+        t_scan = min(timeit.repeat(scan, number=NUMBER, repeat=3)) / NUMBER * 1000
+        t_indexed = min(timeit.repeat(indexed, number=NUMBER, repeat=3)) / NUMBER * 1000
+        print(f"{size:>10} {t_scan:>13.3f} {t_indexed:>14.3f} {t_scan / t_indexed:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Compare the memory held by the coordinator data: remo.models object graphs
+vs. compact records, for a large synthetic account.
+
+Run from the repository root:
+
+    python -m benchmarks.snapshot_memory
+"""
+import gc
+import tracemalloc
+
+from remo.models import ApplianceSchema, DeviceSchema
+
+from custom_components.hacs_nature_remo.api.decoder import json_dumps, json_loads
+from custom_components.hacs_nature_remo.api.records import load_appliances, load_devices
+
+from tests.payloads import appliances_json, devices_json
+
+SIZES = (100, 300, 1000)
+DEVICES = 20
+
+
+def retained(load, body: bytes) -> int:
+    """Bytes still allocated by `load` once the decoded JSON is gone."""
+    gc.collect()
+    tracemalloc.start()
+    result = load(json_loads(body))
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    print(
+        f"{'payload':>10} {'items':>6} {'body (kB)':>10} "
+        f"{'models (kB)':>12} {'records (kB)':>13} {'ratio':>6}"
+    )
+    for size in SIZES:
+        for name, data, models, records in (
+                ("devices", devices_json(size), DeviceSchema(many=True).load, load_devices),
+                ("appliances", appliances_json(size, DEVICES), ApplianceSchema(many=True).load,
+                 load_appliances),
+        ):
+            body = json_dumps(data)
+            m = retained(models, body)
+            r = retained(records, body)
+            print(
+                f"{name:>10} {size:>6} {len(body) / 1000:>10.0f} "
+                f"{m / 1000:>12.0f} {r / 1000:>13.0f} {m / r:>5.1f}x"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""Run the same NatureRemoAPIVer1 workload over each HTTP transport against
+local TLS servers with injected latency.
+
+HTTP/1.1 is served by aiohttp, HTTP/2 by a minimal h2 server. Needs httpx
+and h2, and cryptography for the self-signed certificate.
+
+Run from the repository root:
+
+    python -m benchmarks.transports
+"""
+import asyncio
+from datetime import datetime, timedelta
+import ipaddress
+import json
+import os
+import ssl
+import statistics
+import tempfile
+import time
+
+from aiohttp import web
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+import h2.config
+import h2.connection
+import h2.events
+import h2.exceptions
+
+from custom_components.hacs_nature_remo.api import NatureRemoAPIVer1
+from custom_components.hacs_nature_remo.api.httpx_wrapper import (
+    HttpxWrapper,
+    create_client,
+)
+from custom_components.hacs_nature_remo.api.wrapper import (
+    AioHttpWrapper,
+    create_session,
+)
+
+from tests.payloads import appliances_json, devices_json
+
+ROUNDS = 50
+COMMANDS_PER_ROUND = 8
+CONCURRENCY = (4, 16)
+LATENCY = 0.02
+
+BODIES = {
+    ("GET", "/1/devices"): json.dumps(devices_json(4)).encode(),
+    ("GET", "/1/appliances"): json.dumps(appliances_json(30)).encode(),
+}
+
+
+async def respond(method: str, path: str) -> bytes:
+    await asyncio.sleep(LATENCY)
+    return BODIES.get((method, path), b"{}")
+
+
+def write_certificate(directory: str):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.utcnow()
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+            critical=False,
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+    return cert_path, key_path
+
+
+def server_context(cert_path: str, key_path: str, alpn: str) -> ssl.SSLContext:
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert_path, key_path)
+    context.set_alpn_protocols([alpn])
+    return context
+
+
+# Client addresses of the connections the servers accepted.
+peers = set()
+
+
+class H2Protocol(asyncio.Protocol):
+    """Just enough HTTP/2 to answer the requests of the workload."""
+
+    def __init__(self):
+        self._conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        self._transport = None
+        self._requests = {}
+
+    def connection_made(self, transport):
+        peers.add(transport.get_extra_info("peername"))
+        self._transport = transport
+        self._conn.initiate_connection()
+        transport.write(self._conn.data_to_send())
+
+    def data_received(self, data):
+        try:
+            events = self._conn.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            self._transport.close()
+            return
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                headers = dict(event.headers)
+                self._requests[event.stream_id] = (headers[":method"], headers[":path"])
+            elif isinstance(event, h2.events.DataReceived):
+                self._conn.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id
+                )
+            elif isinstance(event, h2.events.StreamEnded):
+                method, path = self._requests.pop(event.stream_id)
+                asyncio.ensure_future(self._respond(event.stream_id, method, path))
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self._transport.close()
+        self._transport.write(self._conn.data_to_send())
+
+    async def _respond(self, stream_id, method, path):
+        body = await respond(method, path)
+        try:
+            self._conn.send_headers(
+                stream_id,
+                [
+                    (":status", "200"),
+                    ("content-type", "application/json"),
+                    ("content-length", str(len(body))),
+                ],
+            )
+            self._send_body(stream_id, body)
+        except h2.exceptions.StreamClosedError:
+            return
+        self._transport.write(self._conn.data_to_send())
+
+    def _send_body(self, stream_id, body):
+        # Bodies fit the initial flow control window of the workload.
+        size = self._conn.max_outbound_frame_size
+        for start in range(0, len(body), size):
+            self._conn.send_data(stream_id, body[start:start + size])
+        self._conn.end_stream(stream_id)
+
+
+async def start_http1(context: ssl.SSLContext):
+    async def handler(request):
+        peers.add(request.transport.get_extra_info("peername"))
+        return web.Response(
+            body=await respond(request.method, request.path), content_type="application/json"
+        )
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=context)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner.cleanup, port
+
+
+async def start_http2(context: ssl.SSLContext):
+    server = await asyncio.get_running_loop().create_server(
+        H2Protocol, "127.0.0.1", 0, ssl=context
+    )
+    port = server.sockets[0].getsockname()[1]
+
+    async def close():
+        server.close()
+        await server.wait_closed()
+
+    return close, port
+
+
+async def workload(api: NatureRemoAPIVer1):
+    latencies = []
+
+    async def timed(call):
+        start = time.perf_counter()
+        await call
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for round_ in range(ROUNDS):
+        await asyncio.gather(
+            timed(api.get_devices()),
+            timed(api.get_appliances()),
+            *(
+                timed(api.send_signal(f"signal-{round_}-{i}"))
+                for i in range(COMMANDS_PER_ROUND)
+            ),
+        )
+    total = time.perf_counter() - start
+    percentiles = statistics.quantiles(latencies, n=100)
+    return total, percentiles[49] * 1000, percentiles[98] * 1000
+
+
+async def run():
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = write_certificate(directory)
+        close_http1, http1_port = await start_http1(server_context(cert_path, key_path, "http/1.1"))
+        close_http2, http2_port = await start_http2(server_context(cert_path, key_path, "h2"))
+        client_context = ssl.create_default_context(cafile=cert_path)
+
+        transports = (
+            ("aiohttp", http1_port, lambda c: create_session(5, 10, c, ssl_context=client_context)),
+            ("httpx h1", http1_port, lambda c: create_client(5, 10, c, verify=cert_path, http2=False)),
+            ("httpx h2", http2_port, lambda c: create_client(5, 10, c, verify=cert_path)),
+        )
+        print(
+            f"{'transport':>10} {'concurrency':>11} {'total (s)':>10} "
+            f"{'p50 (ms)':>9} {'p99 (ms)':>9} {'connections':>12}"
+        )
+        try:
+            for name, port, create in transports:
+                for concurrency in CONCURRENCY:
+                    client = create(concurrency)
+                    if name == "aiohttp":
+                        wrapper, close = AioHttpWrapper(client), client.close
+                    else:
+                        wrapper, close = HttpxWrapper(client), client.aclose
+                    api = NatureRemoAPIVer1(wrapper, "token", max_concurrency=concurrency)
+                    api.base_url = f"https://127.0.0.1:{port}"
+                    peers.clear()
+                    try:
+                        total, p50, p99 = await workload(api)
+                    finally:
+                        await close()
+                    print(
+                        f"{name:>10} {concurrency:>11} {total:>10.2f} "
+                        f"{p50:>9.1f} {p99:>9.1f} {len(peers):>12}"
+                    )
+        finally:
+            await close_http1()
+            await close_http2()
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
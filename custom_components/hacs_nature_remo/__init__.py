@@ -1,114 +1,283 @@
-from typing import Any, Dict
+import asyncio
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
 
 from homeassistant import core
-from homeassistant.const import CONF_ACCESS_TOKEN
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
+from homeassistant.const import CONF_ACCESS_TOKEN, EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import callback
+from homeassistant.exceptions import ConfigEntryNotReady
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import DeviceInfo, Entity
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from remo.models import Appliance, Device
+from homeassistant.util.ssl import client_context
 import voluptuous as vol
 
-from .api import HTTPWrapper, NatureRemoAPIVer1, Response
-from .api.wrapper import AioHttpWrapper
+from .api import HTTPWrapper, NatureRemoAPIVer1
+from .api.records import ApplianceRecord, DeviceRecord
+from .api.resilient import ResilientWrapper
+from .api.wrapper import AioHttpWrapper, create_session
 from .const import *
+from .coordinator import NatureRemoApplianceCoordinator, NatureRemoDeviceCoordinator
+from .storage import SnapshotStore
+from .transmit import TransmitScheduler
+from .utils import SignalIndex
+
+DEADBAND_SCHEMA = vol.Schema({
+    vol.Optional(CONF_ABSOLUTE): cv.positive_float,
+    vol.Optional(CONF_RELATIVE): cv.positive_float,
+})
 
 CONFIG_SCHEMA = vol.Schema({
     DOMAIN: vol.Required({
-        CONF_ACCESS_TOKEN: cv.string
+        CONF_ACCESS_TOKEN: cv.string,
+        vol.Optional(
+            CONF_RATE_LIMIT_RESERVE, default=DEFAULT_RATE_LIMIT_RESERVE
+        ): cv.positive_int,
+        vol.Optional(
+            CONF_APPLIANCE_UPDATE_INTERVAL, default=DEFAULT_APPLIANCE_UPDATE_INTERVAL
+        ): cv.time_period,
+        vol.Optional(
+            CONF_IR_SIGNAL_GAP, default=DEFAULT_IR_SIGNAL_GAP
+        ): cv.positive_float,
+        vol.Optional(
+            CONF_CONNECT_TIMEOUT, default=DEFAULT_CONNECT_TIMEOUT
+        ): cv.positive_float,
+        vol.Optional(
+            CONF_READ_TIMEOUT, default=DEFAULT_READ_TIMEOUT
+        ): cv.positive_float,
+        vol.Optional(
+            CONF_TRANSPORT, default=DEFAULT_TRANSPORT
+        ): vol.In(TRANSPORTS),
+        vol.Optional(CONF_DEADBANDS, default={}): {
+            vol.In(DEFAULT_DEADBANDS): DEADBAND_SCHEMA,
+        },
+        vol.Optional(
+            CONF_MAX_SILENCE, default=DEFAULT_MAX_SILENCE
+        ): cv.time_period,
     }),
 }, extra=vol.ALLOW_EXTRA)
 
 
-def __get_update_method(_api: NatureRemoAPIVer1):
-    async def __inner__():
-        LOGGER.debug("Trying to fetch appliance and device list from API.")
-        appliances = _api.get_appliances()
-        devices = _api.get_devices()
-        return {"appliances": await appliances, "devices": await devices}
-
-    return __inner__
-
-
 async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
-    """Set up the Nature Remo platform."""
-    # @TODO: Add setup code.
+    """Set up the Nature Remo component.
+
+    The YAML configuration is imported into a config entry.
+    """
     LOGGER.debug("Setting up Nature Remo component.")
-    session = async_get_clientsession(hass)
+    # Data of each account, by config entry id.
+    hass.data.setdefault(DOMAIN, {})
+    if DOMAIN in config:
+        hass.async_create_task(
+            hass.config_entries.flow.async_init(
+                DOMAIN, context={"source": SOURCE_IMPORT}, data=config[DOMAIN]
+            )
+        )
+    return True
+
 
+async def async_setup_entry(hass: core.HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up the Nature Remo from a config entry."""
+    LOGGER.debug("Setting up Nature Remo entry %s.", entry.title)
     # default data
     data: Dict[Any] = {
         KEY_API: None,
         # Need Generic type, so it is required not to be None.
         KEY_COORDINATOR: {},
+        KEY_TRANSMITTER: None,
+        KEY_STORE: None,
+        KEY_CLOSE: None,
         KEY_CONFIG: {},
     }
-    # get config
-    conf = data[KEY_CONFIG] = (config or {}).get(DOMAIN, {})
-    access_token: str = conf.get(CONF_ACCESS_TOKEN, "")
-
-    if len(access_token) != 0:
-        _api = data[KEY_API] = NatureRemoAPIVer1(AioHttpWrapper(session), access_token)
-        coordinator = data[KEY_COORDINATOR] = DataUpdateCoordinator(
+    conf = data[KEY_CONFIG] = entry_config(entry)
+    reserve = conf[CONF_RATE_LIMIT_RESERVE]
+    transport, close = _create_transport(conf)
+    data[KEY_CLOSE] = close
+    _api = data[KEY_API] = NatureRemoAPIVer1(
+        transport, conf[CONF_ACCESS_TOKEN], reserve=reserve
+    )
+    data[KEY_TRANSMITTER] = TransmitScheduler(conf[CONF_IR_SIGNAL_GAP])
+    offset = _poll_offset(hass, entry)
+    coordinators = data[KEY_COORDINATOR] = {
+        KEY_APPLIANCES: NatureRemoApplianceCoordinator(
             hass,
-            LOGGER,
-            name="Nature Remo update",
-            update_method=__get_update_method(_api),
-            update_interval=DEFAULT_UPDATE_INTERVAL,
-        )
-        await coordinator.async_refresh()
+            _api,
+            update_interval=conf[CONF_APPLIANCE_UPDATE_INTERVAL],
+            reserve=reserve,
+            offset=offset,
+        ),
+        KEY_DEVICES: NatureRemoDeviceCoordinator(hass, _api, reserve=reserve, offset=offset),
+    }
+    store = data[KEY_STORE] = SnapshotStore(hass, coordinators, entry.entry_id)
+    if await store.async_restore():
+        # Entities are created from the stored snapshot right away, and
+        # updated when the first refresh lands.
+        for coordinator in coordinators.values():
+            coordinator.async_start_refresh()
     else:
-        # TODO: Add Custom Error
-        raise RuntimeError("Error:Token is not set")
-
-    hass.data[DOMAIN] = data
-    for component in PLATFORMS:
-        hass.async_create_task(
-            hass.helpers.discovery.async_load_platform(component, DOMAIN, {}, config)
+        await asyncio.gather(
+            *(coordinator.async_refresh() for coordinator in coordinators.values())
         )
+        if not all(coordinator.last_update_success for coordinator in coordinators.values()):
+            await close()
+            raise ConfigEntryNotReady("Could not fetch the appliances and devices")
+    store.async_listen()
 
+    async def _close(_event: core.Event):
+        await close()
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _close))
+    entry.async_on_unload(entry.add_update_listener(_async_reload_entry))
+
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = data
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
 
-# async def async_setup_entry(hass: core.HomeAssistant, config: dict) -> bool:
-#     LOGGER.debug(f"setup entry: {config}")
-#     """Set up the Nature Remo from a config entry."""
-#     # @TODO: Add setup code.
-#     hass.data.setdefault(DOMAIN, {})
-#
-#     return True
+async def async_unload_entry(hass: core.HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload the platforms, stop polling and close the connections."""
+    unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unloaded:
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        # Nothing may use the client once it is closed.
+        data[KEY_STORE].async_unlisten()
+        for coordinator in data[KEY_COORDINATOR].values():
+            coordinator.async_cancel()
+        await data[KEY_CLOSE]()
+    return unloaded
+
+
+async def _async_reload_entry(hass: core.HomeAssistant, entry: ConfigEntry):
+    """Apply changed options (or the imported YAML) by reloading the entry."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+def _poll_offset(hass: core.HomeAssistant, entry: ConfigEntry) -> timedelta:
+    """Spread the polls of the accounts over the default update interval."""
+    entries = hass.config_entries.async_entries(DOMAIN)
+    return DEFAULT_UPDATE_INTERVAL * entries.index(entry) / len(entries)
+
 
+def entry_config(entry: ConfigEntry) -> Dict[str, Any]:
+    """Return the configuration of `entry`, its options over its data, with
+    the defaults of the missing keys."""
+    return CONFIG_SCHEMA({DOMAIN: {**entry.data, **entry.options}})[DOMAIN]
 
-class NatureRemoBase(Entity):
-    """Nature Remo entity base class."""
 
-    def __init__(self, coordinator: DataUpdateCoordinator, appliance: Appliance):
+def _create_transport(conf: dict) -> Tuple[HTTPWrapper, Callable[[], Awaitable]]:
+    """Create the HTTP client of the configured transport, and the coroutine
+    function closing it.
+
+    It is not shared with other integrations, so that their traffic does not
+    hold up commands.
+    """
+    connect_timeout = conf[CONF_CONNECT_TIMEOUT]
+    read_timeout = conf[CONF_READ_TIMEOUT]
+    inner = None
+    if conf[CONF_TRANSPORT] == TRANSPORT_HTTPX:
+        try:
+            from .api.httpx_wrapper import HttpxWrapper, create_client
+
+            client = create_client(connect_timeout, read_timeout)
+        except ImportError as e:
+            LOGGER.error("HTTP/2 transport is not available (%s), using aiohttp", e)
+        else:
+            inner, close = HttpxWrapper(client), client.aclose
+    if inner is None:
+        session = create_session(connect_timeout, read_timeout, ssl_context=client_context())
+        inner, close = AioHttpWrapper(session), session.close
+    return ResilientWrapper(inner, timeout=connect_timeout + read_timeout), close
+
+
+class NatureRemoEntity(Entity):
+    """Nature Remo entity which writes its state only when its data changed."""
+
+    def __init__(self, coordinator: DataUpdateCoordinator):
         self._coordinator = coordinator
+        self._fingerprints: Dict[str, Hashable] = {}
+
+    @property
+    def assumed_state(self) -> bool:
+        # The data restored from storage is only assumed until a refresh.
+        return super().assumed_state or getattr(self._coordinator, "stale", False)
+
+    def _has_changed(self, key: str, fingerprint: Hashable) -> bool:
+        """Remember `fingerprint` of the data under `key` and return if it differs
+        from the one seen last time.
+
+        The state is also written again when the data is no longer stale.
+        """
+        fingerprint = (fingerprint, getattr(self._coordinator, "stale", False))
+        if key in self._fingerprints and self._fingerprints[key] == fingerprint:
+            return False
+        self._fingerprints[key] = fingerprint
+        return True
+
+
+class NatureRemoBase(NatureRemoEntity):
+    """Nature Remo entity base class.
+
+    `coordinator` is the appliance coordinator.
+    """
+
+    def __init__(self, coordinator: DataUpdateCoordinator, appliance: ApplianceRecord):
+        super().__init__(coordinator)
         self._attr_name = f"Nature Remo {appliance.nickname}"
         self._appliance_id = appliance.id
         self._device = appliance.device
+        # The Remo sending the signals. Those of an appliance without its
+        # Remo are queued on their own.
+        self._device_id = appliance.id if self._device is None else self._device.id
         self._attr_unique_id = self._appliance_id
         self._attr_should_poll = False
-        self._attr_device_info = DeviceInfo(
-            default_manufacturer="Nature Remo",
-            identifiers={(DOMAIN, self._device.id)},
-            model=self._device.serial_number,
-            name=self._device.name,
-            sw_version=self._device.firmware_version
+        if self._device is not None:
+            self._attr_device_info = DeviceInfo(
+                default_manufacturer="Nature Remo",
+                identifiers={(DOMAIN, self._device.id)},
+                model=self._device.serial_number,
+                name=self._device.name,
+                sw_version=self._device.firmware_version
+            )
+
+
+class NatureRemoSignalBase(NatureRemoBase):
+    """Nature Remo appliance sending the signals learned for it.
+
+    The signals are indexed once, and again when a refresh changed them, so
+    that newly learned ones can be sent.
+    """
+
+    def __init__(self, coordinator: DataUpdateCoordinator, appliance: ApplianceRecord):
+        super().__init__(coordinator, appliance)
+        self._signals = SignalIndex(appliance.signals)
+
+    async def async_added_to_hass(self):
+        """Subscribe to updates."""
+        self.async_on_remove(
+            self._coordinator.async_add_listener(self._handle_signals_update)
         )
 
+    @callback
+    def _handle_signals_update(self):
+        appliance: ApplianceRecord = self._coordinator.data.get(self._appliance_id)
+        if appliance is not None and appliance.signals != self._signals.signals:
+            LOGGER.debug("Signals of %s changed", self._appliance_id)
+            self._signals = SignalIndex(appliance.signals)
 
-class NatureRemoDeviceBase(Entity):
-    """Nature Remo Device entity base class."""
 
-    def __init__(self, coordinator: DataUpdateCoordinator, device: Device):
-        self._coordinator = coordinator
+class NatureRemoDeviceBase(NatureRemoEntity):
+    """Nature Remo Device entity base class.
+
+    `coordinator` is the device coordinator.
+    """
+
+    def __init__(self, coordinator: DataUpdateCoordinator, device: DeviceRecord):
+        super().__init__(coordinator)
         self._attr_name = f"Nature Remo {device.name}"
         self._device = device
-        self._coordinator = coordinator
         self._appliance_id = device.id
         self._attr_unique_id = self._appliance_id
-        self._attr_should_poll = True
+        self._attr_should_poll = False
         self._attr_device_info = DeviceInfo(
             default_manufacturer="Nature Remo",
             identifiers={(DOMAIN, self._device.id)},
@@ -119,10 +288,26 @@ class NatureRemoDeviceBase(Entity):
 
     async def async_added_to_hass(self):
         """Subscribe to updates."""
+        self._has_changed(KEY_DEVICES, self._fingerprint())
         self.async_on_remove(
-            self._coordinator.async_add_listener(self.async_write_ha_state)
+            self._coordinator.async_add_listener(self._handle_coordinator_update)
         )
 
+    def _fingerprint(self) -> Hashable:
+        """Return the part of the device data the state depends on."""
+        device: DeviceRecord = self._coordinator.data.get(self._device.id)
+        if device is None:
+            return None
+        return tuple(
+            (key, event.created_at, event.val)
+            for key, event in sorted(device.newest_events.items())
+        )
+
+    @callback
+    def _handle_coordinator_update(self):
+        if self._has_changed(KEY_DEVICES, self._fingerprint()):
+            self.async_write_ha_state()
+
     async def async_update(self):
         """Update the entity.
         Only used by the generic entity update service.
@@ -1,17 +1,30 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+import asyncio
+from collections import defaultdict
 from dataclasses import dataclass
 from enum import Enum, auto
-from typing import Any, Coroutine, Mapping, Optional
+import hashlib
+import logging
+import time
+from typing import Any, Callable, Coroutine, Dict, Mapping, Optional, Tuple, TypeVar
 
 from remo import NatureRemoError
 from remo.models import *
 
+from .decoder import DECODER, json_loads
+from .dispatcher import DEFAULT_MAX_CONCURRENCY, Priority, RequestDispatcher
+from .records import ApplianceRecord, DeviceRecord, load_appliances, load_devices
+
 BASE_URL = "https://api.nature.global"
 __version__ = ""
 __url__ = ""
 
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
 
 class HTTPMethod(Enum):
     GET = auto()
@@ -42,11 +55,24 @@ class Response(ABC):
     async def json(self):
         pass
 
+    @abstractmethod
+    async def read(self) -> bytes:
+        pass
+
     @property
     @abstractmethod
     def ok(self):
         pass
 
+    async def release(self):
+        """Give the connection back, for the next request to reuse."""
+
+    async def __aenter__(self) -> Response:
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.release()
+
 
 class HTTPWrapper(ABC):
     @abstractmethod
@@ -68,11 +94,21 @@ def enable_debug_mode():
 
 
 async def build_error_message(resp: Response) -> str:
-    error = await resp.json()
-    return (
-            f"HTTP Status Code: {resp.status_code}, "
-            + f'Nature Remo Code: {error["code"]}, Message: {error["message"]}'
-    )
+    body = await resp.read()
+    try:
+        error = json_loads(body)
+        return (
+                f"HTTP Status Code: {resp.status_code}, "
+                + f'Nature Remo Code: {error["code"]}, Message: {error["message"]}'
+        )
+    except (ValueError, TypeError, KeyError):
+        # Not from the API itself, e.g. a proxy error page.
+        text = body[:200].decode(errors="replace")
+        return f"HTTP Status Code: {resp.status_code}, Response: {text}"
+
+
+class PollDeferredError(NatureRemoError):
+    """A background request was not sent to keep the rate limit for commands."""
 
 
 @dataclass
@@ -83,10 +119,84 @@ class RateLimit:
     reset: Optional[datetime] = None
 
 
+@dataclass
+class EndpointStats:
+    """Debug counters of one endpoint."""
+
+    requests: int = 0
+    # Calls which joined a request already in flight.
+    coalesced: int = 0
+    # The body was byte-identical to the previous one.
+    unchanged: int = 0
+    # The server answered 304 to If-None-Match.
+    not_modified: int = 0
+    # Not sent because only the reserved rate limit budget was left.
+    deferred: int = 0
+    decoded: int = 0
+    # Parsing the bodies, then building the models.
+    json_seconds: float = 0.0
+    load_seconds: float = 0.0
+
+    @property
+    def decode_seconds(self) -> float:
+        return self.json_seconds + self.load_seconds
+
+    @property
+    def skipped(self) -> int:
+        return self.unchanged + self.not_modified
+
+    @property
+    def saved_seconds(self) -> float:
+        """Estimated deserialization time saved by reusing previous results."""
+        if self.decoded == 0:
+            return 0.0
+        return self.skipped * self.decode_seconds / self.decoded
+
+
+@dataclass
+class _CachedPayload:
+    etag: Optional[str]
+    digest: bytes
+    value: Any
+
+
+class _Body:
+    """A body fetched once for all the loaders of its endpoint."""
+
+    __slots__ = ("endpoint", "etag", "digest", "values", "_body", "_data")
+
+    def __init__(self, endpoint: str, etag: Optional[str], body: bytes):
+        self.endpoint = endpoint
+        self.etag = etag
+        self.digest = hashlib.blake2b(body, digest_size=16).digest()
+        # Loaded results, by key of their loader.
+        self.values: Dict[str, Any] = {}
+        self._body = body
+        self._data = None
+
+    def json(self, stats: EndpointStats) -> Any:
+        """Parse the body, on the first call only."""
+        if self._body is not None:
+            start = time.perf_counter()
+            self._data = json_loads(self._body)
+            parsed = time.perf_counter() - start
+            self._body = None
+            stats.json_seconds += parsed
+            _LOGGER.debug("%s parsed in %.3f s with %s", self.endpoint, parsed, DECODER)
+        return self._data
+
+
 class NatureRemoAPIVer1:
     """Client for the Nature Remo API."""
 
-    def __init__(self, inner: HTTPWrapper, access_token: str, debug: bool = False):
+    def __init__(
+            self,
+            inner: HTTPWrapper,
+            access_token: str,
+            debug: bool = False,
+            reserve: int = 0,
+            max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ):
         if debug:
             enable_debug_mode()
         self._inner = inner
@@ -94,31 +204,194 @@ class NatureRemoAPIVer1:
         self.access_token = access_token
         self.base_url = BASE_URL
         self.rate_limit = RateLimit()
-
-    def __request(self, endpoint: str, method: HTTPMethod, data: dict = None
-                  ) -> Coroutine[Any, Any, Response]:
+        # Requests left in the rate limit window that polls must not use.
+        self.reserve = reserve
+        self._dispatcher = RequestDispatcher(max_concurrency)
+        self.stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self._payloads: Dict[str, _CachedPayload] = {}
+        self._in_flight: Dict[Tuple[str, Optional[str]], asyncio.Future] = {}
+
+    async def __request(self, endpoint: str, method: HTTPMethod, data: dict = None,
+                        extra_headers: dict = None, priority: Priority = None) -> Response:
+        """Send a request once the dispatcher has a slot for it.
+
+        POSTs are commands by default and GETs polls. Background requests
+        raise PollDeferredError instead of using the reserved budget.
+        """
+        if priority is None:
+            priority = Priority.COMMAND if method == HTTPMethod.POST else Priority.POLL
         headers = {
             "Accept": "application/json",
             "Authorization": f"Bearer {self.access_token}",
             "User-Agent": f"nature-remo/{__version__} ({__url__})",
         }
+        if extra_headers:
+            headers.update(extra_headers)
 
         url = f"{self.base_url}{endpoint}"
 
-        try:
+        async def send() -> Response:
+            # Checked once the slot is granted, the budget may have
+            # shrunk while waiting for it.
+            if priority != Priority.COMMAND:
+                self.__check_budget(endpoint)
             if method == HTTPMethod.GET:
-                return self._inner.get(url, headers=headers)
+                resp = await self._inner.get(url, headers=headers)
             else:
-                return self._inner.post(url, headers=headers, data=data)
+                resp = await self._inner.post(url, headers=headers, data=data)
+            # Read within the slot, so that the connection is back in the
+            # pool for the next request, also when the body is not used.
+            try:
+                await resp.read()
+            except BaseException:
+                await resp.release()
+                raise
+            return resp
+
+        try:
+            return await self._dispatcher.run(priority, send)
         except OSError as e:
             raise NatureRemoError(e)
 
+    def __check_budget(self, endpoint: str):
+        rate_limit = self.rate_limit
+        if rate_limit.remaining is None or rate_limit.reset is None:
+            return
+        if rate_limit.remaining > self.reserve or datetime.utcnow() >= rate_limit.reset:
+            return
+        raise PollDeferredError(
+            f"{endpoint} deferred until {rate_limit.reset} UTC, "
+            f"the {rate_limit.remaining} requests left are reserved for commands"
+        )
+
     async def __get_json(self, resp: Response) -> Any:
-        self.__set_rate_limit(resp)
-        if resp.ok:
-            return await resp.json()
-        error_message = await build_error_message(resp)
-        raise NatureRemoError(error_message)
+        async with resp:
+            self.__set_rate_limit(resp)
+            if resp.ok:
+                return await resp.json()
+            error_message = await build_error_message(resp)
+            raise NatureRemoError(error_message)
+
+    async def __post(self, endpoint: str, data: dict = None):
+        """POST a command whose response has no body of interest."""
+        async with await self.__request(endpoint, HTTPMethod.POST, data) as resp:
+            self.__set_rate_limit(resp)
+            if not resp.ok:
+                raise NatureRemoError(await build_error_message(resp))
+
+    async def __get_loaded(
+            self,
+            endpoint: str,
+            load: Callable[[Any], T],
+            priority: Priority = Priority.POLL,
+            key: str = None,
+    ) -> T:
+        """GET `endpoint` and deserialize it with `load`.
+
+        Concurrent calls for the same endpoint share one request, and its
+        body is parsed once for all their loaders. If the body did not change
+        since the last call, the previously loaded objects are returned as
+        they are, so callers must not modify them. When the request is
+        deferred for the rate limit, the previous result is returned if there
+        is one.
+
+        Results are kept under `key`, the endpoint by default, so that each
+        loader of an endpoint gets its own.
+        """
+        key = key or endpoint
+        stats = self.stats[endpoint]
+        cached = self._payloads.get(key)
+        try:
+            body = await self.__get_body(
+                endpoint, priority, None if cached is None else cached.etag
+            )
+        except PollDeferredError as e:
+            if cached is None:
+                raise
+            _LOGGER.debug("%s, using the previous result", e)
+            return cached.value
+        if body is None:
+            # 304 for the ETag of the cached result.
+            stats.not_modified += 1
+            self.__log_skipped(endpoint, stats)
+            return cached.value
+        if cached is not None and cached.digest == body.digest:
+            stats.unchanged += 1
+            self.__log_skipped(endpoint, stats)
+            return cached.value
+        if key in body.values:
+            # Loaded by a concurrent call with the same loader.
+            return body.values[key]
+        data = body.json(stats)
+        start = time.perf_counter()
+        value = load(data)
+        loaded = time.perf_counter() - start
+        stats.decoded += 1
+        stats.load_seconds += loaded
+        _LOGGER.debug("%s loaded in %.3f s", endpoint, loaded)
+        body.values[key] = value
+        self._payloads[key] = _CachedPayload(body.etag, body.digest, value)
+        return value
+
+    async def __get_body(
+            self, endpoint: str, priority: Priority, etag: Optional[str]
+    ) -> Optional[_Body]:
+        """GET `endpoint`, joining the same request if it is in flight.
+
+        Returns None if the server answered 304 to `etag`.
+        """
+        # Loaders with caches of different ETags need different requests.
+        key = (endpoint, etag)
+        stats = self.stats[endpoint]
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            stats.coalesced += 1
+            _LOGGER.debug(
+                "%s already in flight, joined it (%d calls coalesced)",
+                endpoint,
+                stats.coalesced,
+            )
+        else:
+            in_flight = asyncio.ensure_future(self.__fetch_body(endpoint, priority, etag))
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # One caller being cancelled must not cancel the request of the others.
+        return await asyncio.shield(in_flight)
+
+    async def __fetch_body(
+            self, endpoint: str, priority: Priority, etag: Optional[str]
+    ) -> Optional[_Body]:
+        stats = self.stats[endpoint]
+        extra_headers = None
+        if etag is not None:
+            extra_headers = {"If-None-Match": etag}
+        try:
+            resp = await self.__request(
+                endpoint, HTTPMethod.GET, extra_headers=extra_headers, priority=priority
+            )
+        except PollDeferredError:
+            stats.deferred += 1
+            raise
+        stats.requests += 1
+        async with resp:
+            self.__set_rate_limit(resp)
+            if resp.status_code == 304 and etag is not None:
+                return None
+            if not resp.ok:
+                raise NatureRemoError(await build_error_message(resp))
+            body = await resp.read()
+            return _Body(endpoint, resp.headers.get("ETag"), body)
+
+    @staticmethod
+    def __log_skipped(endpoint: str, stats: EndpointStats):
+        _LOGGER.debug(
+            "%s unchanged, skipped deserialization "
+            "(%d of %d requests, about %.3f s saved)",
+            endpoint,
+            stats.skipped,
+            stats.requests,
+            stats.saved_seconds,
+        )
 
     def __set_rate_limit(self, resp: Response):
         if "Date" in resp.headers:
@@ -143,9 +416,7 @@ class NatureRemoAPIVer1:
             A User object.
         """
         endpoint = f"{self._endpoint_base}/users/me"
-        resp = await self.__request(endpoint, HTTPMethod.GET)
-        json = await self.__get_json(resp)
-        return UserSchema().load(json)
+        return await self.__get_loaded(endpoint, UserSchema().load, Priority.CATALOG)
 
     async def update_user(self, nickname: str) -> User:
         """Update authenticated user's information.
@@ -170,9 +441,16 @@ class NatureRemoAPIVer1:
             A List of Device objects.
         """
         endpoint = f"{self._endpoint_base}/devices"
-        resp = await self.__request(endpoint, HTTPMethod.GET)
-        json = await self.__get_json(resp)
-        return DeviceSchema(many=True).load(json)
+        return await self.__get_loaded(endpoint, DeviceSchema(many=True).load)
+
+    async def get_device_records(self) -> List[DeviceRecord]:
+        """Fetch the list of Remo devices as compact records.
+
+        Returns:
+            A List of DeviceRecord objects.
+        """
+        endpoint = f"{self._endpoint_base}/devices"
+        return await self.__get_loaded(endpoint, load_devices, key="device_records")
 
     async def update_device(self, device: str, name: str):
         """Update Remo.
@@ -182,9 +460,7 @@ class NatureRemoAPIVer1:
             name: Device name.
         """
         endpoint = f"{self._endpoint_base}/devices/{device}"
-        resp = await self.__request(endpoint, HTTPMethod.POST, {"name": name})
-        if not resp.ok:
-            raise NatureRemoError(await build_error_message(resp))
+        await self.__post(endpoint, {"name": name})
 
     async def delete_device(self, device: str):
         """Delete Remo.
@@ -193,9 +469,7 @@ class NatureRemoAPIVer1:
             device: Device ID.
         """
         endpoint = f"{self._endpoint_base}/devices/{device}/delete"
-        resp = await self.__request(endpoint, HTTPMethod.POST)
-        if not resp.ok:
-            raise NatureRemoError(await build_error_message(resp))
+        await self.__post(endpoint)
 
     async def update_temperature_offset(self, device: str, offset: int):
         """Update temperature offset.
@@ -205,9 +479,7 @@ class NatureRemoAPIVer1:
             offset: Temperature offset value added to the measured temperature.
         """
         endpoint = f"{self._endpoint_base}/devices/{device}/temperature_offset"
-        resp = await self.__request(endpoint, HTTPMethod.POST, {"offset": offset})
-        if not resp.ok:
-            raise NatureRemoError(await build_error_message(resp))
+        await self.__post(endpoint, {"offset": offset})
 
     async def update_humidity_offset(self, device: str, offset: int):
         """Update humidity offset.
@@ -217,9 +489,7 @@ class NatureRemoAPIVer1:
             offset: Humidity offset value added to the measured humidity.
         """
         endpoint = f"{self._endpoint_base}/devices/{device}/humidity_offset"
-        resp = await self.__request(endpoint, HTTPMethod.POST, {"offset": offset})
-        if not resp.ok:
-            raise NatureRemoError(await build_error_message(resp))
+        await self.__post(endpoint, {"offset": offset})
 
     async def detect_appliance(self, message: str) -> List[ApplianceModelAndParams]:
         """Find the air conditioner best matching the provided infrared signal.
@@ -240,9 +510,20 @@ class NatureRemoAPIVer1:
             A list of Appliance objects.
         """
         endpoint = f"{self._endpoint_base}/appliances"
-        resp = await self.__request(endpoint, HTTPMethod.GET)
-        json = await self.__get_json(resp)
-        return ApplianceSchema(many=True).load(json)
+        return await self.__get_loaded(
+            endpoint, ApplianceSchema(many=True).load, Priority.CATALOG
+        )
+
+    async def get_appliance_records(self) -> List[ApplianceRecord]:
+        """Fetch the list of appliances as compact records.
+
+        Returns:
+            A list of ApplianceRecord objects.
+        """
+        endpoint = f"{self._endpoint_base}/appliances"
+        return await self.__get_loaded(
+            endpoint, load_appliances, Priority.CATALOG, key="appliance_records"
+        )
 
     async def create_appliance(
             self,
@@ -279,11 +560,7 @@ class NatureRemoAPIVer1:
             appliances: List of all appliances' IDs comma separated.
         """
         endpoint = f"{self._endpoint_base}/appliance_orders"
-        resp = await self.__request(
-            endpoint, HTTPMethod.POST, {"appliances": appliances}
-        )
-        if not resp.ok:
-            raise NatureRemoError(await build_error_message(resp))
+        await self.__post(endpoint, {"appliances": appliances})
 
     async def delete_appliance(self, appliance: str):
         """Delete appliance.
@@ -292,9 +569,7 @@ class NatureRemoAPIVer1:
             appliance: Appliance ID.
         """
         endpoint = f"{self._endpoint_base}/appliances/{appliance}/delete"
-        resp = await self.__request(endpoint, HTTPMethod.POST)
-        if not resp.ok:
-            raise NatureRemoError(await build_error_message(resp))
+        await self.__post(endpoint)
 
     async def update_appliance(
             self, appliance: str, nickname: str, image: str
@@ -321,7 +596,7 @@ class NatureRemoAPIVer1:
             air_volume: str = None,
             air_direction: str = None,
             button: str = None,
-    ):
+    ) -> AirConParams:
         """Update air conditioner settings.
 
         Args:
@@ -331,6 +606,9 @@ class NatureRemoAPIVer1:
             air_volume: AC air volume.
             air_direction: AC air direction.
             button: Button.
+
+        Returns:
+            The resulting AirConParams.
         """
         endpoint = f"{self._endpoint_base}/appliances/{appliance}/aircon_settings"
         data = {}
@@ -345,8 +623,8 @@ class NatureRemoAPIVer1:
         if button:
             data["button"] = button
         resp = await self.__request(endpoint, HTTPMethod.POST, data)
-        if not resp.ok:
-            raise NatureRemoError(await build_error_message(resp))
+        json = await self.__get_json(resp)
+        return AirConParamsSchema().load(json)
 
     async def send_tv_infrared_signal(self, appliance: str, button: str):
         """Send tv infrared signal.
@@ -356,9 +634,7 @@ class NatureRemoAPIVer1:
             button: Button name.
         """
         endpoint = f"{self._endpoint_base}/appliances/{appliance}/tv"
-        resp = await self.__request(endpoint, HTTPMethod.POST, {"button": button})
-        if not resp.ok:
-            raise NatureRemoError(await build_error_message(resp))
+        await self.__post(endpoint, {"button": button})
 
     async def send_light_infrared_signal(self, appliance: str, button: str):
         """Send light infrared signal.
@@ -368,9 +644,7 @@ class NatureRemoAPIVer1:
             button: Button name.
         """
         endpoint = f"{self._endpoint_base}/appliances/{appliance}/light"
-        resp = await self.__request(endpoint, HTTPMethod.POST, {"button": button})
-        if not resp.ok:
-            raise NatureRemoError(await build_error_message(resp))
+        await self.__post(endpoint, {"button": button})
 
     async def get_signals(self, appliance: str) -> List[Signal]:
         """Fetch signals registered under this appliance.
@@ -379,9 +653,9 @@ class NatureRemoAPIVer1:
             appliance: Appliance ID.
         """
         endpoint = f"{self._endpoint_base}/appliances/{appliance}/signals"
-        resp = await self.__request(endpoint, HTTPMethod.GET)
-        json = await self.__get_json(resp)
-        return SignalSchema(many=True).load(json)
+        return await self.__get_loaded(
+            endpoint, SignalSchema(many=True).load, Priority.CATALOG
+        )
 
     async def create_signal(
             self, appliance: str, name: str, message: str, image: str
@@ -412,9 +686,7 @@ class NatureRemoAPIVer1:
             signals: List of all signals' IDs comma separated.
         """
         endpoint = f"{self._endpoint_base}/appliances/{appliance}/signal_orders"
-        resp = await self.__request(endpoint, HTTPMethod.POST, {"signals": signals})
-        if not resp.ok:
-            raise NatureRemoError(await build_error_message(resp))
+        await self.__post(endpoint, {"signals": signals})
 
     async def update_signal(self, signal: str, name: str, image: str):
         """Update infrared signal.
@@ -425,11 +697,7 @@ class NatureRemoAPIVer1:
             image: Basename of the image file included in the app.
         """
         endpoint = f"{self._endpoint_base}/signals/{signal}"
-        resp = await self.__request(
-            endpoint, HTTPMethod.POST, {"name": name, "image": image}
-        )
-        if not resp.ok:
-            raise NatureRemoError(await build_error_message(resp))
+        await self.__post(endpoint, {"name": name, "image": image})
 
     async def delete_signal(self, signal: str):
         """Delete infrared signal.
@@ -438,9 +706,7 @@ class NatureRemoAPIVer1:
             signal: Signal ID.
         """
         endpoint = f"{self._endpoint_base}/signals/{signal}/delete"
-        resp = await self.__request(endpoint, HTTPMethod.POST)
-        if not resp.ok:
-            raise NatureRemoError(await build_error_message(resp))
+        await self.__post(endpoint)
 
     async def send_signal(self, signal: str):
         """Send infrared signal.
@@ -449,9 +715,7 @@ class NatureRemoAPIVer1:
             signal: Signal ID.
         """
         endpoint = f"{self._endpoint_base}/signals/{signal}/send"
-        resp = await self.__request(endpoint, HTTPMethod.POST)
-        if not resp.ok:
-            raise NatureRemoError(await build_error_message(resp))
+        await self.__post(endpoint)
 
 
 class NatureRemoLocalAPIVer1:
@@ -505,6 +769,6 @@ class NatureRemoLocalAPIVer1:
               Includes "data", "freq" and "format" keys.
         """
         endpoint = "/messages"
-        resp = await self.__request(endpoint, HTTPMethod.POST, message)
-        if not resp.ok:
-            raise NatureRemoError(f"{resp.status_code} {resp.reason}")
+        async with await self.__request(endpoint, HTTPMethod.POST, message) as resp:
+            if not resp.ok:
+                raise NatureRemoError(f"{resp.status_code} {resp.reason}")
@@ -0,0 +1,16 @@
+"""JSON decoding of response bodies, with orjson when it is installed."""
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+
+    DECODER = "orjson"
+except ImportError:  # pragma: no cover
+    import json
+
+    json_loads = json.loads
+
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    DECODER = "json"
+
+__all__ = ["DECODER", "json_dumps", "json_loads"]
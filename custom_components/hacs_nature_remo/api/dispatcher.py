@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+from enum import IntEnum
+import heapq
+import itertools
+from typing import Any, Awaitable, Callable, List, Tuple, TypeVar
+
+T = TypeVar('T')
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+class Priority(IntEnum):
+    """Request priority, lower values are dispatched first."""
+
+    # Light, switch, climate and signal commands of the user.
+    COMMAND = 0
+    # Sensor polling.
+    POLL = 1
+    # Appliances, signals and other rarely changing data.
+    CATALOG = 2
+
+
+class RequestDispatcher:
+    """Run requests with at most `max_concurrency` of them in flight.
+
+    Waiting requests start in order of priority, then of arrival. One slot
+    is kept for commands, so they never wait behind background requests.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self._limit = max(max_concurrency, 1)
+        self._background_limit = max(self._limit - 1, 1)
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    async def run(
+            self, priority: Priority, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any
+    ) -> T:
+        await self._acquire(priority)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            self._release()
+
+    def _can_start(self, priority: int) -> bool:
+        limit = self._limit if priority == Priority.COMMAND else self._background_limit
+        return self._active < limit
+
+    async def _acquire(self, priority: Priority):
+        if self._can_start(priority) and (not self._waiters or self._waiters[0][0] > priority):
+            self._active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before the cancellation.
+                self._release()
+            raise
+
+    def _release(self):
+        self._active -= 1
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                # cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_start(priority):
+                break
+            heapq.heappop(self._waiters)
+            self._active += 1
+            future.set_result(None)
@@ -0,0 +1,91 @@
+"""Decoding of the ECHONET Lite properties of a low-voltage smart meter.
+
+The API sends each property value as a decimal string.
+"""
+from __future__ import annotations
+
+from typing import Mapping, NamedTuple, Optional
+
+EPC_COEFFICIENT = 0xD3
+EPC_NORMAL_ENERGY = 0xE0
+EPC_ENERGY_UNIT = 0xE1
+EPC_REVERSE_ENERGY = 0xE3
+EPC_INSTANTANEOUS_POWER = 0xE7
+EPC_INSTANTANEOUS_CURRENT = 0xE8
+
+# kWh of one unit of the cumulative energy, by the code of 0xE1.
+ENERGY_UNITS = {
+    0x00: 1,
+    0x01: 0.1,
+    0x02: 0.01,
+    0x03: 0.001,
+    0x04: 0.0001,
+    0x0A: 10,
+    0x0B: 100,
+    0x0C: 1000,
+    0x0D: 10000,
+}
+# Current of a phase a single-phase two-wire meter does not have.
+NO_CURRENT = 0x7FFE
+
+
+class SmartMeterReading(NamedTuple):
+    # W
+    power: Optional[int] = None
+    # A, of the R and T phases together
+    current: Optional[float] = None
+    # kWh
+    normal_energy: Optional[float] = None
+    reverse_energy: Optional[float] = None
+    # When the power was measured
+    updated_at: Optional[str] = None
+
+
+def _int(properties: Mapping[int, str], epc: int) -> Optional[int]:
+    try:
+        return int(properties[epc])
+    except (KeyError, ValueError):
+        return None
+
+
+def _signed(value: Optional[int], bits: int) -> Optional[int]:
+    if value is None or value < 1 << (bits - 1):
+        return value
+    return value - (1 << bits)
+
+
+def _current(value: Optional[int]) -> Optional[float]:
+    # The R phase in the upper two bytes, the T phase in the lower two, in
+    # 0.1 A.
+    if value is None:
+        return None
+    phases = [
+        _signed(x, 16) for x in (value >> 16 & 0xFFFF, value & 0xFFFF) if x != NO_CURRENT
+    ]
+    return round(sum(phases) / 10, 1)
+
+
+def decode_smart_meter(
+        by_epc: Mapping[int, str], updated_at: Optional[str] = None
+) -> SmartMeterReading:
+    """Decode the readings of the property values indexed by EPC.
+
+    `updated_at` is the one of the instantaneous power.
+    """
+    energy_unit = ENERGY_UNITS.get(_int(by_epc, EPC_ENERGY_UNIT), 1)
+    coefficient = _int(by_epc, EPC_COEFFICIENT) or 1
+
+    def energy(epc: int) -> Optional[float]:
+        value = _int(by_epc, epc)
+        if value is None:
+            return None
+        # The smallest unit is 0.0001 kWh, rounding drops the float noise.
+        return round(value * coefficient * energy_unit, 4)
+
+    return SmartMeterReading(
+        power=_signed(_int(by_epc, EPC_INSTANTANEOUS_POWER), 32),
+        current=_current(_int(by_epc, EPC_INSTANTANEOUS_CURRENT)),
+        normal_energy=energy(EPC_NORMAL_ENERGY),
+        reverse_energy=energy(EPC_REVERSE_ENERGY),
+        updated_at=updated_at,
+    )
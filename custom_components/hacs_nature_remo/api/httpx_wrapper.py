@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import Union
+
+import httpx
+
+from . import HTTPWrapper, Response
+from .decoder import json_loads
+from .dispatcher import DEFAULT_MAX_CONCURRENCY
+
+
+def create_client(
+        connect_timeout: float,
+        read_timeout: float,
+        max_connections: int = DEFAULT_MAX_CONCURRENCY,
+        verify: Union[bool, str] = True,
+        http2: bool = True,
+) -> httpx.AsyncClient:
+    """Create a client multiplexing requests over one HTTP/2 connection.
+
+    HTTP/2 needs the h2 package. `verify` is True or a CA bundle, an
+    SSLContext would lose the ALPN protocols. The caller closes it.
+    """
+    return httpx.AsyncClient(
+        http2=http2,
+        verify=verify,
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        limits=httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        ),
+    )
+
+
+class HttpxWrapper(HTTPWrapper):
+
+    def __init__(self, client: httpx.AsyncClient):
+        super().__init__()
+        self._client = client
+
+    async def get(self, url, headers=None) -> Response:
+        try:
+            resp = await self._client.get(url, headers=headers)
+        except httpx.TransportError as e:
+            # Transport errors are OSErrors for the callers.
+            raise ConnectionError(e) from e
+        return _HttpxResponseWrapper(resp)
+
+    async def post(self, url, headers=None, data=None) -> Response:
+        try:
+            resp = await self._client.post(url, headers=headers, data=data)
+        except httpx.TransportError as e:
+            raise ConnectionError(e) from e
+        return _HttpxResponseWrapper(resp)
+
+
+class _HttpxResponseWrapper(Response):
+    """The body is already read, and the connection released."""
+
+    def __init__(self, original: httpx.Response):
+        super().__init__()
+        self._original = original
+
+    @property
+    def ok(self):
+        return self._original.status_code < 400
+
+    @property
+    def status_code(self) -> any:
+        return self._original.status_code
+
+    @property
+    def headers(self):
+        return self._original.headers
+
+    @property
+    def reason(self) -> str | None:
+        return self._original.reason_phrase
+
+    async def json(self):
+        return json_loads(self._original.content)
+
+    async def read(self) -> bytes:
+        return self._original.content
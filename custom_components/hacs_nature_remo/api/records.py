@@ -0,0 +1,180 @@
+"""Compact records of the devices and appliances payloads.
+
+They hold only what the platforms read, instead of the full `remo.models`
+object graphs. The whole item is kept compressed and decoded again by `raw`
+on demand. Short strings repeated across items (types, images, modes) are
+interned.
+"""
+from __future__ import annotations
+
+from sys import intern
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+import zlib
+
+from .decoder import json_dumps, json_loads
+from .echonet import EPC_INSTANTANEOUS_POWER, SmartMeterReading, decode_smart_meter
+
+
+class SensorEvent(NamedTuple):
+    val: float
+    created_at: str
+
+
+class AirConSettings(NamedTuple):
+    temp: str
+    mode: str
+    vol: str
+    dir: str
+    button: str
+
+
+class AirConMode(NamedTuple):
+    temp: Tuple[str, ...]
+    vol: Tuple[str, ...]
+    dir: Tuple[str, ...]
+
+
+class ButtonRecord(NamedTuple):
+    name: str
+    image: str
+    label: str
+
+
+class SignalRecord(NamedTuple):
+    id: str
+    name: str
+    image: str
+
+
+class EchonetProperty(NamedTuple):
+    name: str
+    epc: int
+    val: str
+    updated_at: str
+
+
+class _Record:
+    __slots__ = ("_raw",)
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        """The whole item as sent by the API, decoded on each access."""
+        return json_loads(zlib.decompress(self._raw))
+
+
+def _pack(data: Mapping[str, Any]) -> bytes:
+    return zlib.compress(json_dumps(data), 1)
+
+
+class DeviceRecord(_Record):
+    """A Remo, with its newest sensor events when fetched from /devices."""
+
+    __slots__ = ("id", "name", "serial_number", "firmware_version", "newest_events")
+
+    def __init__(self, data: Mapping[str, Any]):
+        self.id: str = data["id"]
+        self.name: str = data.get("name", "")
+        self.serial_number: Optional[str] = data.get("serial_number")
+        self.firmware_version: Optional[str] = data.get("firmware_version")
+        self.newest_events: Dict[str, SensorEvent] = {
+            key: SensorEvent(float(event["val"]), event.get("created_at", ""))
+            for key, event in (data.get("newest_events") or {}).items()
+        }
+        self._raw = _pack(data)
+
+
+class ApplianceRecord(_Record):
+    """An appliance, with what the climate, light, sensor and switch
+    platforms need of it."""
+
+    __slots__ = (
+        "id",
+        "type",
+        "nickname",
+        "image",
+        "device",
+        "settings",
+        "aircon_modes",
+        "light_buttons",
+        "signals",
+        "smart_meter",
+        "meter",
+    )
+
+    def __init__(self, data: Mapping[str, Any], device: Optional[DeviceRecord],
+                 aircon_modes: Optional[Mapping[str, AirConMode]]):
+        self.id: str = data["id"]
+        self.type: str = intern(data.get("type", ""))
+        self.nickname: str = data.get("nickname", "")
+        self.image: str = intern(data.get("image", ""))
+        self.device = device
+        settings = data.get("settings")
+        self.settings: Optional[AirConSettings] = None if settings is None else AirConSettings(
+            *(intern(settings.get(key, "")) for key in AirConSettings._fields)
+        )
+        self.aircon_modes = aircon_modes
+        light = data.get("light") or {}
+        self.light_buttons: Tuple[ButtonRecord, ...] = tuple(
+            ButtonRecord(
+                *(intern(b.get(key, "")) for key in ButtonRecord._fields)
+            )
+            for b in light.get("buttons") or ()
+        )
+        self.signals: Tuple[SignalRecord, ...] = tuple(
+            SignalRecord(s["id"], s.get("name", ""), intern(s.get("image", "")))
+            for s in data.get("signals") or ()
+        )
+        smart_meter = data.get("smart_meter")
+        self.smart_meter: Optional[Tuple[EchonetProperty, ...]] = None
+        self.meter: Optional[SmartMeterReading] = None
+        if smart_meter is not None:
+            properties = []
+            by_epc = {}
+            updated_at = None
+            for p in smart_meter.get("echonetlite_properties") or ():
+                properties.append(EchonetProperty(
+                    p.get("name", ""), p["epc"], p.get("val", ""), p.get("updated_at", "")
+                ))
+                by_epc[p["epc"]] = p.get("val", "")
+                if p["epc"] == EPC_INSTANTANEOUS_POWER:
+                    updated_at = p.get("updated_at")
+            self.smart_meter = tuple(properties)
+            self.meter = decode_smart_meter(by_epc, updated_at)
+        self._raw = _pack(data)
+
+
+def load_devices(data: List[Dict[str, Any]]) -> List[DeviceRecord]:
+    return [DeviceRecord(x) for x in data]
+
+
+def load_appliances(data: List[Dict[str, Any]]) -> List[ApplianceRecord]:
+    """Build the records, sharing devices and equal aircon ranges between
+    appliances.
+
+    An appliance sent without its Remo has no device.
+    """
+    devices: Dict[str, DeviceRecord] = {}
+    ranges: Dict[Tuple, Mapping[str, AirConMode]] = {}
+    records = []
+    for x in data:
+        device = x.get("device") or {}
+        key = device.get("id")
+        if key is not None and key not in devices:
+            devices[key] = DeviceRecord(device)
+        records.append(ApplianceRecord(x, devices.get(key), _aircon_modes(x, ranges)))
+    return records
+
+
+def _aircon_modes(data: Mapping[str, Any], ranges: Dict) -> Optional[Mapping[str, AirConMode]]:
+    aircon = data.get("aircon")
+    if not aircon:
+        return None
+    modes = tuple(
+        (intern(name), AirConMode(
+            *(tuple(map(intern, mode.get(key) or ())) for key in AirConMode._fields)
+        ))
+        for name, mode in ((aircon.get("range") or {}).get("modes") or {}).items()
+    )
+    if modes not in ranges:
+        ranges[modes] = dict(modes)
+    return ranges[modes]
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Optional
+
+from remo import NatureRemoError
+
+from . import HTTPWrapper, Response
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_DEADLINE = 30.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 8.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_TIME = 60.0
+
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+TOO_MANY_REQUESTS = 429
+
+
+class CircuitOpenError(NatureRemoError):
+    """The API failed repeatedly, requests fail fast until it recovers."""
+
+
+class CircuitBreaker:
+    """Open after `failure_threshold` consecutive failures.
+
+    While open, requests are refused for `recovery_time` seconds. Then one
+    trial request is let through every `recovery_time` seconds until one
+    succeeds.
+    """
+
+    def __init__(
+            self,
+            failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+            recovery_time: float = DEFAULT_RECOVERY_TIME,
+    ):
+        self._failure_threshold = failure_threshold
+        self._recovery_time = recovery_time
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def check(self):
+        """Raise CircuitOpenError if a request must not be sent now."""
+        if self._opened_at is None:
+            return
+        now = time.monotonic()
+        remaining = self._opened_at + self._recovery_time - now
+        if remaining > 0:
+            raise CircuitOpenError(
+                f"Nature Remo API unavailable, retrying in {remaining:.0f} s"
+            )
+        # The trial request, the others keep failing fast meanwhile.
+        self._opened_at = now
+
+    def record_success(self):
+        if self._opened_at is not None:
+            _LOGGER.info("Nature Remo API recovered")
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        if self._opened_at is not None or self._failures >= self._failure_threshold:
+            if self._opened_at is None:
+                _LOGGER.warning(
+                    "Nature Remo API failed %d times in a row, pausing requests for %.0f s",
+                    self._failures,
+                    self._recovery_time,
+                )
+            self._opened_at = time.monotonic()
+
+
+def retry_after(resp: Response) -> Optional[float]:
+    """Seconds to wait before retrying a 429, if the response tells."""
+    value = resp.headers.get("Retry-After")
+    if value is not None:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                at = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                at = None
+            if at is not None:
+                return max((at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    value = resp.headers.get("X-Rate-Limit-Reset")
+    if value is not None:
+        try:
+            return max(int(value) - time.time(), 0.0)
+        except ValueError:
+            pass
+    return None
+
+
+class ResilientWrapper(HTTPWrapper):
+    """Add timeouts, retries and a circuit breaker to another HTTPWrapper.
+
+    Every attempt times out after `timeout` seconds and a request gives up
+    after `deadline` seconds. GETs are retried on connection errors,
+    timeouts and 5xx with jittered exponential backoff. 429s are retried
+    after the time the API asks for, if it ends before the deadline.
+    """
+
+    def __init__(
+            self,
+            inner: HTTPWrapper,
+            timeout: float = DEFAULT_TIMEOUT,
+            deadline: float = DEFAULT_DEADLINE,
+            max_retries: int = DEFAULT_MAX_RETRIES,
+            backoff: float = DEFAULT_BACKOFF,
+            max_backoff: float = DEFAULT_MAX_BACKOFF,
+            breaker: Optional[CircuitBreaker] = None,
+    ):
+        super().__init__()
+        self._inner = inner
+        self._timeout = timeout
+        self._deadline = deadline
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+
+    async def get(self, url, headers=None) -> Response:
+        return await self.__send(lambda: self._inner.get(url, headers=headers), url, True)
+
+    async def post(self, url, headers=None, data=None) -> Response:
+        # A POST may have been applied even if its response got lost.
+        return await self.__send(
+            lambda: self._inner.post(url, headers=headers, data=data), url, False
+        )
+
+    @staticmethod
+    async def __receive(request: Callable[[], Awaitable[Response]]) -> Response:
+        # The body is read within the attempt, so that a connection lost in
+        # the middle of it is retried and counted like a failed request.
+        resp = await request()
+        try:
+            await resp.read()
+        except BaseException:
+            await resp.release()
+            raise
+        return resp
+
+    async def __send(
+            self, request: Callable[[], Awaitable[Response]], url: str, idempotent: bool
+    ) -> Response:
+        deadline = time.monotonic() + self._deadline
+        attempt = 0
+        while True:
+            self.breaker.check()
+            timeout = min(self._timeout, deadline - time.monotonic())
+            try:
+                resp = await asyncio.wait_for(self.__receive(request), timeout)
+            except (asyncio.TimeoutError, OSError) as e:
+                self.breaker.record_failure()
+                error = e
+                resp = None
+            else:
+                if resp.status_code in RETRY_STATUSES:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                error = None
+
+            delay = None
+            if attempt < self._max_retries:
+                if resp is not None and resp.status_code == TOO_MANY_REQUESTS:
+                    # Nothing was processed, so POSTs can be retried too.
+                    delay = retry_after(resp)
+                elif idempotent and (resp is None or resp.status_code in RETRY_STATUSES):
+                    delay = random.uniform(
+                        0, min(self._max_backoff, self._backoff * 2 ** attempt)
+                    )
+            if delay is None or time.monotonic() + delay >= deadline:
+                if error is not None:
+                    raise NatureRemoError(f"Request to {url} failed: {error!r}") from error
+                return resp
+
+            attempt += 1
+            _LOGGER.debug(
+                "Retrying %s in %.2f s (attempt %d, %s)",
+                url,
+                delay,
+                attempt,
+                repr(error) if resp is None else resp.status_code,
+            )
+            if resp is not None:
+                await resp.release()
+            await asyncio.sleep(delay)
@@ -1,8 +1,36 @@
 from __future__ import annotations
 
+import ssl
+from typing import Optional
+
 import aiohttp
 
 from . import HTTPWrapper, Response
+from .decoder import json_loads
+from .dispatcher import DEFAULT_MAX_CONCURRENCY
+
+# Seconds the address of the API host is cached.
+DNS_CACHE_TTL = 300
+
+
+def create_session(
+        connect_timeout: float,
+        read_timeout: float,
+        limit_per_host: int = DEFAULT_MAX_CONCURRENCY,
+        ssl_context: Optional[ssl.SSLContext] = None,
+) -> aiohttp.ClientSession:
+    """Create a keep-alive session for the Nature Remo cloud alone.
+
+    The caller closes it.
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        enable_cleanup_closed=True,
+        ssl=ssl_context,
+    )
+    timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
 
 
 class AioHttpWrapper(HTTPWrapper):
@@ -12,11 +40,18 @@ class AioHttpWrapper(HTTPWrapper):
         self._session = session
 
     async def get(self, url, headers=None) -> Response:
-        resp = await self._session.get(url=url, headers=headers)
+        try:
+            resp = await self._session.get(url=url, headers=headers)
+        except aiohttp.ClientError as e:
+            # Transport errors are OSErrors for the callers.
+            raise ConnectionError(e) from e
         return _AioHttpResponseWrapper(resp)
 
     async def post(self, url, headers=None, data=None) -> Response:
-        resp = await self._session.post(url=url, headers=headers, data=data)
+        try:
+            resp = await self._session.post(url=url, headers=headers, data=data)
+        except aiohttp.ClientError as e:
+            raise ConnectionError(e) from e
         return _AioHttpResponseWrapper(resp)
 
 
@@ -46,4 +81,21 @@ class _AioHttpResponseWrapper(Response):
         return self._original.reason
 
     async def json(self):
-        return await self._original.json()
+        return json_loads(await self.read())
+
+    async def read(self) -> bytes:
+        try:
+            return await self._original.read()
+        except aiohttp.ClientError as e:
+            # e.g. the connection dropped in the middle of the body.
+            raise ConnectionError(e) from e
+
+    async def release(self):
+        # aiohttp closes the connection of a body not read to the end instead
+        # of reusing it. The bodies of the API are small.
+        try:
+            await self._original.read()
+        except aiohttp.ClientError:
+            # The connection is lost anyway.
+            pass
+        await self._original.release()
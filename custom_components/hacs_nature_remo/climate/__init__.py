@@ -1,6 +1,7 @@
 """Support for Nature Remo AC."""
+from functools import partial
 import logging
-from typing import Dict
+from typing import List, Mapping, Optional, Union
 
 from homeassistant.components.climate import ClimateEntity
 from homeassistant.components.climate.const import (
@@ -10,17 +11,31 @@ from homeassistant.components.climate.const import (
 )
 from homeassistant.const import ATTR_TEMPERATURE, TEMP_CELSIUS
 from homeassistant.core import callback
+from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from remo.models import AirConParams, AirConRangeMode, Appliance, Device
+from remo.models import AirConParams
 
 from custom_components.hacs_nature_remo import NatureRemoAPIVer1, NatureRemoBase
+from custom_components.hacs_nature_remo.api.records import (
+    AirConMode,
+    AirConSettings,
+    ApplianceRecord,
+    DeviceRecord,
+)
+from custom_components.hacs_nature_remo.climate.buffer import AirConSettingsBuffer
+from custom_components.hacs_nature_remo.climate.capabilities import (
+    NO_CAPABILITIES,
+    ModeCapabilities,
+    compile_modes,
+)
 from custom_components.hacs_nature_remo.climate.helper import (
     _check_mode_is_off,
     _mode_ha_to_remo,
     _mode_remo_to_ha,
 )
 from custom_components.hacs_nature_remo.const import *
-from custom_components.hacs_nature_remo.utils import find_by
+from custom_components.hacs_nature_remo.discovery import EntityDiscovery
+from custom_components.hacs_nature_remo.transmit import TransmitScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,32 +43,42 @@ SUPPORT_FLAGS = SUPPORT_TARGET_TEMPERATURE | SUPPORT_FAN_MODE | SUPPORT_SWING_MO
 PREVIOUS_TARGET_TEMP_KEY = "previous_target_temperature"
 
 
-async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
+async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the Nature Remo AC."""
-    if discovery_info is None:
-        return
     _LOGGER.debug("Setting up climate platform.")
-    _data = hass.data.get(DOMAIN)
-    coordinator = _data.get(KEY_COORDINATOR)
-    appliances = coordinator.data.get(KEY_APPLIANCES)
+    _data = hass.data[DOMAIN][entry.entry_id]
+    coordinators = _data.get(KEY_COORDINATOR)
+    appliance_coordinator = coordinators.get(KEY_APPLIANCES)
+    device_coordinator = coordinators.get(KEY_DEVICES)
     api = _data.get(KEY_API)
+    transmitter = _data.get(KEY_TRANSMITTER)
     config = _data.get(KEY_CONFIG)
-    async_add_entities(
-        [
-            NatureRemoAC(coordinator, api, appliance, config)
-            for appliance in appliances
-            if appliance.type == "AC"
-        ]
+
+    def build(appliance: ApplianceRecord) -> List[Entity]:
+        if appliance.type != "AC":
+            return []
+        return [NatureRemoAC(
+            appliance_coordinator, device_coordinator, api, transmitter, appliance, config
+        )]
+
+    entry.async_on_unload(
+        EntityDiscovery(hass, appliance_coordinator, async_add_entities, build).async_start()
     )
 
 
 class NatureRemoAC(NatureRemoBase, ClimateEntity):
     """Implementation of a Nature Remo E sensor."""
 
-    def __init__(self, coordinator: DataUpdateCoordinator, api: NatureRemoAPIVer1, appliance: Appliance, config):
+    def __init__(self, coordinator: DataUpdateCoordinator, device_coordinator: DataUpdateCoordinator,
+                 api: NatureRemoAPIVer1, transmitter: TransmitScheduler, appliance: ApplianceRecord, config):
         super().__init__(coordinator, appliance)
+        self._device_coordinator = device_coordinator
         self._api = api
-        self.__modes: Dict[str, AirConRangeMode] = appliance.aircon.range.modes
+        self._buffer = AirConSettingsBuffer(partial(
+            transmitter.run, self._device_id, api.update_aircon_settings, appliance.id
+        ))
+        self.__modes: Optional[Mapping[str, AirConMode]] = None
+        self.__capabilities: Mapping[str, ModeCapabilities] = {}
         self.__current_mode: str = ""
 
         # Update static data
@@ -61,21 +86,28 @@ class NatureRemoAC(NatureRemoBase, ClimateEntity):
         self._attr_temperature_unit = TEMP_CELSIUS
         for v in AIRCON_MODES_REMO:
             self._set_last_target_temp(v, None)
-        self._set_hvac_modes()
-
-        self._update(appliance.settings)
-
-    def _update(self, ac_settings: AirConParams, device: Device = None):
+        self._set_modes(appliance.aircon_modes)
+
+        device = device_coordinator.data.get(self._device_id)
+        self._update(appliance.settings, device)
+        self._has_changed(KEY_APPLIANCES, _settings_fingerprint(appliance.settings))
+        self._has_changed(KEY_DEVICES, _temperature_fingerprint(device))
+
+    def _update(
+            self,
+            ac_settings: Union[AirConSettings, AirConParams],
+            device: DeviceRecord = None,
+    ):
         # hold this to determine the ac mode while it's turned-off
         _remo_mode_key = ac_settings.mode
-        _remo_mode_value = self.__modes.get(_remo_mode_key)
 
         if ac_settings.mode:
             self.__current_mode = ac_settings.mode
         else:
             self.__current_mode = STR_POWER_OFF
+        capabilities = self.__capabilities.get(self.__current_mode, NO_CAPABILITIES)
 
-        self._set_target_temperature_step()
+        self._attr_target_temperature_step = capabilities.step
 
         # Update target temperature
         try:
@@ -95,20 +127,19 @@ class NatureRemoAC(NatureRemoBase, ClimateEntity):
         self._attr_swing_mode = ac_settings.dir or None
 
         # Update fan and swing modes
-        self._attr_fan_modes = _remo_mode_value.vol
-        self._attr_swing_modes = _remo_mode_value.dir
-
-        # Update temp lange
-        temp_range_list = _get_temp_range_list(self.__modes, self.__current_mode)
-        if len(temp_range_list) == 0:
-            self._attr_min_temp = 0
-            self._attr_max_temp = 0
-        else:
-            self._attr_min_temp = min(temp_range_list)
-            self._attr_max_temp = max(temp_range_list)
+        self._attr_fan_modes = list(capabilities.fan_modes)
+        self._attr_swing_modes = list(capabilities.swing_modes)
+
+        # Update temp range
+        self._attr_min_temp = capabilities.min_temp
+        self._attr_max_temp = capabilities.max_temp
 
         # Update current temperature
         if device is not None:
+            self._update_current_temperature(device)
+
+    def _update_current_temperature(self, device: DeviceRecord):
+        if "te" in device.newest_events:
             self._attr_current_temperature = float(device.newest_events.get("te").val)
 
     async def async_set_temperature(self, **kwargs):
@@ -129,14 +160,15 @@ class NatureRemoAC(NatureRemoBase, ClimateEntity):
         if _check_mode_is_off(mode):
             await self._post({"button": mode})
         else:
-            data = {"operation_mode": mode}
+            defaults = {}
             _last_target_temp = self._get_last_target_temp(mode)
             if _last_target_temp is not None:
                 if _last_target_temp.is_integer():
                     # has to cast to whole number otherwise API will return an error
                     _last_target_temp = int(_last_target_temp)
-                data.setdefault("temperature", _last_target_temp)
-            await self._post(data)
+                # A temperature set explicitly along with the mode wins.
+                defaults["temperature"] = _last_target_temp
+            await self._post({"operation_mode": mode}, defaults)
 
     async def async_set_fan_mode(self, fan_mode):
         """Set new target fan mode."""
@@ -153,6 +185,10 @@ class NatureRemoAC(NatureRemoBase, ClimateEntity):
         self.async_on_remove(
             self._coordinator.async_add_listener(self._update_callback)
         )
+        self.async_on_remove(
+            self._device_coordinator.async_add_listener(self._device_update_callback)
+        )
+        self.async_on_remove(self._buffer.cancel)
 
     async def async_update(self):
         """Update the entity.
@@ -162,27 +198,48 @@ class NatureRemoAC(NatureRemoBase, ClimateEntity):
 
     @callback
     def _update_callback(self):
-        self._update(
-            find_by(self._coordinator.data.get(KEY_APPLIANCES), "id", self._appliance_id).settings,
-            find_by(self._coordinator.data.get(KEY_DEVICES), "id", self._device.id),
-        )
+        appliance: ApplianceRecord = self._coordinator.data.get(self._appliance_id)
+        if appliance is None:
+            return
+        modes_changed = self._set_modes(appliance.aircon_modes)
+        if not self._has_changed(
+                KEY_APPLIANCES, _settings_fingerprint(appliance.settings)
+        ) and not modes_changed:
+            return
+        self._update(appliance.settings)
         self.async_write_ha_state()
 
-    async def _post(self, data):
-        await self._api.update_aircon_settings(self._appliance_id, **data)
-        await self._coordinator.async_request_refresh()
+    @callback
+    def _device_update_callback(self):
+        device: DeviceRecord = self._device_coordinator.data.get(self._device_id)
+        if device is None or not self._has_changed(
+                KEY_DEVICES, _temperature_fingerprint(device)
+        ):
+            return
+        self._update_current_temperature(device)
         self.async_write_ha_state()
 
-    def _set_target_temperature_step(self):
-        temp_range = _get_temp_range_list(self.__modes, self.__current_mode)
-        if len(temp_range) >= 2:
-            # determine step from the gap of first and second temperature
-            step = round(temp_range[1] - temp_range[0], 1)
-            if step in [1.0, 0.5]:  # valid steps
-                self._attr_target_temperature_step = step
-                return step
-        self._attr_target_temperature_step = 1
-        return 1
+    async def _post(self, data, defaults=None):
+        # Settings changed while others are being sent are sent together.
+        # The response carries the resulting settings, so there is no need
+        # to refresh the whole appliance list.
+        ac_settings = await self._buffer.post(data, defaults)
+        if self._has_changed(KEY_APPLIANCES, _settings_fingerprint(ac_settings)):
+            self._update(ac_settings)
+            self.async_write_ha_state()
+
+    def _set_modes(self, modes: Optional[Mapping[str, AirConMode]]) -> bool:
+        """Compile the capabilities of the aircon range, if it changed.
+
+        Returns if it changed.
+        """
+        modes = modes or {}
+        if modes == self.__modes:
+            return False
+        self.__modes = modes
+        self.__capabilities = compile_modes(modes)
+        self._set_hvac_modes()
+        return True
 
     def _set_hvac_modes(self):
         remo_modes = list(self.__modes.keys())
@@ -207,9 +264,18 @@ class NatureRemoAC(NatureRemoBase, ClimateEntity):
         return None
 
 
-def _get_temp_range_list(modes, mode: str):
-    if mode in modes:
-        temp_range = modes.get(mode).temp
-        return list(map(float, filter(None, temp_range)))
-    else:
-        return []
+def _settings_fingerprint(ac_settings: Union[AirConSettings, AirConParams]):
+    return (
+        ac_settings.temp,
+        ac_settings.mode,
+        ac_settings.vol,
+        ac_settings.dir,
+        ac_settings.button,
+    )
+
+
+def _temperature_fingerprint(device: DeviceRecord):
+    if device is None or "te" not in device.newest_events:
+        return None
+    event = device.newest_events.get("te")
+    return event.created_at, event.val
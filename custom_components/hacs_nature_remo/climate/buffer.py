@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from remo.models import AirConParams
+
+
+class AirConSettingsBuffer:
+    """Merge aircon settings of one appliance posted while its previous
+    settings are being sent into a single call of `send`, e.g.
+    update_aircon_settings bound to the appliance.
+
+    Settings posted while idle are sent at once. Every caller of a batch gets
+    the settings the API returned for it. Batches are sent in order.
+    """
+
+    def __init__(self, send: Callable[..., Awaitable[AirConParams]]):
+        self._send_settings = send
+        self._pending: Dict[str, Any] = {}
+        self._defaults: Dict[str, Any] = {}
+        self._batch: Optional[asyncio.Task] = None
+        self._sending: Optional[asyncio.Task] = None
+
+    def post(
+            self, data: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None
+    ) -> Awaitable[AirConParams]:
+        """Send `data` with the next batch.
+
+        `defaults` (e.g. the last temperature of a mode) are only sent if no
+        caller of the batch sets them explicitly.
+        """
+        if "operation_mode" in data:
+            # Choosing a mode turns the AC on again.
+            self._pending.pop("button", None)
+        self._pending.update(data)
+        self._defaults.update(defaults or {})
+        if self._batch is None:
+            self._batch = asyncio.get_running_loop().create_task(self._send())
+        # A caller giving up must not cancel the request of the others.
+        return asyncio.shield(self._batch)
+
+    async def _send(self) -> AirConParams:
+        previous = self._sending
+        self._sending = self._batch
+        if previous is not None:
+            # Settings posted meanwhile join this batch.
+            await asyncio.wait([previous])
+        data = {**self._defaults, **self._pending}
+        self._pending, self._defaults, self._batch = {}, {}, None
+        return await self._send_settings(**data)
+
+    def cancel(self):
+        for task in (self._batch, self._sending):
+            if task is not None:
+                task.cancel()
+        self._pending, self._defaults = {}, {}
+        self._batch, self._sending = None, None
@@ -0,0 +1,46 @@
+"""What an AC supports in each of its modes, compiled from its aircon range."""
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Tuple
+
+from custom_components.hacs_nature_remo.api.records import AirConMode
+
+# Target temperature steps the climate entity can show.
+VALID_STEPS = (1.0, 0.5)
+
+
+class ModeCapabilities(NamedTuple):
+    temps: Tuple[float, ...]
+    min_temp: float
+    max_temp: float
+    step: float
+    fan_modes: Tuple[str, ...]
+    swing_modes: Tuple[str, ...]
+
+
+# For a mode missing from the range, e.g. while the AC is off.
+NO_CAPABILITIES = ModeCapabilities((), 0, 0, 1, (), ())
+
+
+def compile_mode(mode: AirConMode) -> ModeCapabilities:
+    temps = tuple(map(float, filter(None, mode.temp)))
+    step = 1
+    if len(temps) >= 2:
+        # determine step from the gap of first and second temperature
+        gap = round(temps[1] - temps[0], 1)
+        if gap in VALID_STEPS:
+            step = gap
+    return ModeCapabilities(
+        temps,
+        min(temps, default=0),
+        max(temps, default=0),
+        step,
+        mode.vol,
+        mode.dir,
+    )
+
+
+def compile_modes(modes: Mapping[str, AirConMode]) -> Mapping[str, ModeCapabilities]:
+    """Compile the modes of an aircon range, to be looked up on each update."""
+    return MappingProxyType({name: compile_mode(mode) for name, mode in modes.items()})
@@ -0,0 +1,168 @@
+"""Config flow for Nature Remo."""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from importlib.util import find_spec
+from typing import Any, Dict, Optional
+
+from homeassistant import config_entries
+from homeassistant.const import CONF_ACCESS_TOKEN
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import homeassistant.helpers.config_validation as cv
+from remo import NatureRemoError
+from remo.models import User
+import voluptuous as vol
+
+from .api import NatureRemoAPIVer1
+from .api.resilient import ResilientWrapper
+from .api.wrapper import AioHttpWrapper
+from .const import *
+
+
+async def validate_access_token(hass: HomeAssistant, access_token: str) -> User:
+    """Fetch the user of `access_token`.
+
+    Raises NatureRemoError if the token is rejected or the cloud is not
+    reachable (caused by an OSError or a timeout then).
+    """
+    api = NatureRemoAPIVer1(
+        ResilientWrapper(AioHttpWrapper(async_get_clientsession(hass)), max_retries=0),
+        access_token,
+    )
+    return await api.get_user()
+
+
+def _error(e: NatureRemoError) -> str:
+    cause = e.__cause__ or e.__context__
+    if isinstance(cause, (OSError, asyncio.TimeoutError)):
+        return "cannot_connect"
+    return "invalid_auth"
+
+
+def transport_available(transport: str) -> bool:
+    """Return if the packages of `transport` are installed."""
+    if transport == TRANSPORT_HTTPX:
+        return find_spec("httpx") is not None and find_spec("h2") is not None
+    return True
+
+
+def _seconds(conf: Dict[str, Any], key: str, default: timedelta) -> int:
+    value = conf.get(key, default)
+    if isinstance(value, timedelta):
+        value = value.total_seconds()
+    return int(value)
+
+
+def _options_schema(conf: Dict[str, Any]) -> vol.Schema:
+    interval = _seconds(conf, CONF_APPLIANCE_UPDATE_INTERVAL, DEFAULT_APPLIANCE_UPDATE_INTERVAL)
+    return vol.Schema({
+        vol.Required(CONF_ACCESS_TOKEN, default=conf.get(CONF_ACCESS_TOKEN, "")): cv.string,
+        vol.Optional(
+            CONF_RATE_LIMIT_RESERVE,
+            default=conf.get(CONF_RATE_LIMIT_RESERVE, DEFAULT_RATE_LIMIT_RESERVE),
+        ): cv.positive_int,
+        vol.Optional(CONF_APPLIANCE_UPDATE_INTERVAL, default=interval): vol.All(
+            vol.Coerce(int), vol.Range(min=int(MIN_UPDATE_INTERVAL.total_seconds()))
+        ),
+        vol.Optional(
+            CONF_IR_SIGNAL_GAP, default=conf.get(CONF_IR_SIGNAL_GAP, DEFAULT_IR_SIGNAL_GAP)
+        ): cv.positive_float,
+        vol.Optional(
+            CONF_CONNECT_TIMEOUT,
+            default=conf.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT),
+        ): cv.positive_float,
+        vol.Optional(
+            CONF_READ_TIMEOUT, default=conf.get(CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT)
+        ): cv.positive_float,
+        vol.Optional(
+            CONF_TRANSPORT, default=conf.get(CONF_TRANSPORT, DEFAULT_TRANSPORT)
+        ): vol.In(TRANSPORTS),
+        vol.Optional(
+            CONF_MAX_SILENCE,
+            default=_seconds(conf, CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+        ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+    })
+
+
+class NatureRemoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
+    """Set up a Nature Remo account from its access token.
+
+    Each account is an entry, with the id of its user as unique id. The YAML
+    configuration is the one entry imported.
+    """
+
+    VERSION = 1
+
+    async def async_step_user(self, user_input: Optional[Dict[str, Any]] = None) -> FlowResult:
+        errors = {}
+        if user_input is not None:
+            try:
+                user = await validate_access_token(self.hass, user_input[CONF_ACCESS_TOKEN])
+            except NatureRemoError as e:
+                LOGGER.debug("Access token validation failed: %s", e)
+                errors["base"] = _error(e)
+            else:
+                await self.async_set_unique_id(user.id)
+                self._abort_if_unique_id_configured()
+                return self.async_create_entry(title=user.nickname, data=user_input)
+        return self.async_show_form(
+            step_id="user",
+            data_schema=vol.Schema({vol.Required(CONF_ACCESS_TOKEN): cv.string}),
+            errors=errors,
+        )
+
+    async def async_step_import(self, conf: Dict[str, Any]) -> FlowResult:
+        """Import the YAML configuration, or update the entry imported before."""
+        data = {**conf}
+        for key in (CONF_APPLIANCE_UPDATE_INTERVAL, CONF_MAX_SILENCE):
+            if isinstance(data.get(key), timedelta):
+                data[key] = data[key].total_seconds()
+        for entry in self._async_current_entries():
+            if entry.source != config_entries.SOURCE_IMPORT:
+                continue
+            if entry.data != data:
+                self.hass.config_entries.async_update_entry(entry, data=data)
+            return self.async_abort(reason="already_configured")
+        return self.async_create_entry(title="Nature Remo", data=data)
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry):
+        return NatureRemoOptionsFlow(config_entry)
+
+
+class NatureRemoOptionsFlow(config_entries.OptionsFlow):
+    """Change the token and the options; the entry is reloaded with them.
+
+    A new token must belong to the account of the entry.
+    """
+
+    def __init__(self, config_entry: config_entries.ConfigEntry):
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input: Optional[Dict[str, Any]] = None) -> FlowResult:
+        conf = {**self.config_entry.data, **self.config_entry.options}
+        errors = {}
+        if user_input is not None:
+            user = None
+            try:
+                if user_input[CONF_ACCESS_TOKEN] != conf.get(CONF_ACCESS_TOKEN):
+                    user = await validate_access_token(self.hass, user_input[CONF_ACCESS_TOKEN])
+            except NatureRemoError as e:
+                LOGGER.debug("Access token validation failed: %s", e)
+                errors["base"] = _error(e)
+            if not transport_available(user_input.get(CONF_TRANSPORT, DEFAULT_TRANSPORT)):
+                errors[CONF_TRANSPORT] = "transport_unavailable"
+            if not errors:
+                # The entry of the YAML configuration has no account to match.
+                unique_id = self.config_entry.unique_id
+                if user is not None and unique_id is not None and user.id != unique_id:
+                    return self.async_abort(reason="wrong_account")
+                return self.async_create_entry(title="", data=user_input)
+            conf = {**conf, **user_input}
+        return self.async_show_form(
+            step_id="init", data_schema=_options_schema(conf), errors=errors
+        )
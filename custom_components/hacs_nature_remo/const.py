@@ -17,10 +17,72 @@ DOMAIN: str = "hacs_nature_remo"
 LOGGER: Logger = getLogger(__package__)
 
 DEFAULT_UPDATE_INTERVAL = timedelta(seconds=60)
+MIN_UPDATE_INTERVAL = timedelta(seconds=20)
+MAX_UPDATE_INTERVAL = timedelta(minutes=5)
+# Appliances (signals, aircon ranges, ...) rarely change.
+DEFAULT_APPLIANCE_UPDATE_INTERVAL = timedelta(minutes=5)
+# Appliances whose state changes on its own: the settings of an AC (changed
+# with its remote) and the readings of a smart meter. With one of them, the
+# appliance list is fetched at the pace of the sensors.
+LIVE_APPLIANCE_TYPES = ("AC", "EL_SMART_METER")
+# Requests of the rate limit window kept for user-initiated commands.
+DEFAULT_RATE_LIMIT_RESERVE = 10
+# Seconds between two infrared signals sent by the same Remo.
+DEFAULT_IR_SIGNAL_GAP = 0.5
+# Seconds to wait for a connection and for data from the API.
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 10.0
+# Longest time a sensor state is not written while readings come in.
+DEFAULT_MAX_SILENCE = timedelta(minutes=10)
+
+CONF_RATE_LIMIT_RESERVE = "rate_limit_reserve"
+CONF_APPLIANCE_UPDATE_INTERVAL = "appliance_update_interval"
+CONF_IR_SIGNAL_GAP = "ir_signal_gap"
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_READ_TIMEOUT = "read_timeout"
+CONF_TRANSPORT = "transport"
+CONF_DEADBANDS = "deadbands"
+CONF_ABSOLUTE = "absolute"
+CONF_RELATIVE = "relative"
+CONF_MAX_SILENCE = "max_silence"
+
+# Sensor types with a deadband, and the smallest change of each worth a
+# state write by default, around the jitter of the readings. Temperature and
+# humidity change in steps of their resolution, each is written by default.
+SENSOR_TEMPERATURE = "temperature"
+SENSOR_HUMIDITY = "humidity"
+SENSOR_ILLUMINANCE = "illuminance"
+SENSOR_POWER = "power"
+SENSOR_CURRENT = "current"
+DEFAULT_DEADBANDS = {
+    SENSOR_TEMPERATURE: {CONF_ABSOLUTE: 0.0, CONF_RELATIVE: 0.0},
+    SENSOR_HUMIDITY: {CONF_ABSOLUTE: 0.0, CONF_RELATIVE: 0.0},
+    SENSOR_ILLUMINANCE: {CONF_ABSOLUTE: 2.0, CONF_RELATIVE: 0.1},
+    SENSOR_POWER: {CONF_ABSOLUTE: 10.0, CONF_RELATIVE: 0.05},
+    SENSOR_CURRENT: {CONF_ABSOLUTE: 0.5, CONF_RELATIVE: 0.05},
+}
+
+TRANSPORT_AIOHTTP = "aiohttp"
+# HTTP/2 on httpx, needs the h2 package.
+TRANSPORT_HTTPX = "httpx"
+TRANSPORTS = [TRANSPORT_AIOHTTP, TRANSPORT_HTTPX]
+DEFAULT_TRANSPORT = TRANSPORT_AIOHTTP
+
+# The last snapshot fetched, restored on the next start. The config entry
+# id of the account is appended.
+STORAGE_KEY = f"{DOMAIN}.snapshot"
+STORAGE_VERSION = 1
+# Seconds to wait for more changes before writing the snapshot.
+STORAGE_SAVE_DELAY = 10
+# Readings kept per sensor for the mean, min and max attributes.
+SERIES_SIZE = 360
 
 KEY_API = "api"
-KEY_CONFIG = "api"
+KEY_CONFIG = "config"
 KEY_COORDINATOR = "coordinator"
+KEY_TRANSMITTER = "transmitter"
+KEY_STORE = "store"
+KEY_CLOSE = "close"
 KEY_APPLIANCES = "appliances"
 KEY_DEVICES = "devices"
 
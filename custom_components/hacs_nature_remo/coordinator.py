@@ -0,0 +1,202 @@
+"""Update coordinators for the Nature Remo cloud API."""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from homeassistant import core
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from remo import NatureRemoError
+
+from .api import NatureRemoAPIVer1, RateLimit
+from .api.records import ApplianceRecord, DeviceRecord
+from .const import *
+from .snapshot import Snapshot
+
+
+def compute_update_interval(
+        rate_limit: RateLimit,
+        reserve: int = DEFAULT_RATE_LIMIT_RESERVE,
+        default: timedelta = DEFAULT_UPDATE_INTERVAL,
+        minimum: timedelta = MIN_UPDATE_INTERVAL,
+        maximum: timedelta = MAX_UPDATE_INTERVAL,
+) -> timedelta:
+    """Spread the remaining rate limit budget over the rest of the window.
+
+    `reserve` requests are never spent on polling so that commands still go
+    through. If the budget is exhausted, wait until the window resets.
+    """
+    if rate_limit.remaining is None or rate_limit.reset is None:
+        return default
+    now = rate_limit.checked_at or datetime.utcnow()
+    until_reset = max((rate_limit.reset - now).total_seconds(), 0)
+    budget = rate_limit.remaining - reserve
+    if budget < 1:
+        return max(timedelta(seconds=until_reset + 1), minimum)
+    interval = timedelta(seconds=until_reset / budget)
+    return min(max(interval, minimum), maximum)
+
+
+class NatureRemoUpdateCoordinator(DataUpdateCoordinator, ABC):
+    """Coordinator polling one endpoint at a rate-limit-aware pace.
+
+    `data` is a `Snapshot` of the fetched items, empty until the first
+    successful refresh. `stale` is set while it is a snapshot restored from
+    storage, until a refresh succeeds.
+
+    `offset` delays the refresh after the first one, so that the accounts
+    set up together do not poll in the same second.
+    """
+
+    def __init__(
+            self,
+            hass: core.HomeAssistant,
+            api: NatureRemoAPIVer1,
+            name: str,
+            update_interval: timedelta,
+            reserve: int,
+            offset: timedelta = timedelta(0),
+    ):
+        super().__init__(hass, LOGGER, name=name, update_interval=update_interval)
+        self.data = Snapshot()
+        self.stale = False
+        self._items = None
+        self._api = api
+        self._reserve = reserve
+        self._default_interval = update_interval
+        self._offset = offset
+        self._unloaded = False
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @abstractmethod
+    async def _async_fetch(self) -> Any:
+        """Fetch the items from the API into a snapshot."""
+
+    @core.callback
+    def async_restore(self, snapshot: Snapshot):
+        """Serve `snapshot` until the first successful refresh."""
+        self.data = snapshot
+        self.stale = True
+        self._items = None
+
+    @core.callback
+    def async_start_refresh(self):
+        """Refresh in the background, e.g. while serving a restored snapshot."""
+        self._refresh_task = self.hass.async_create_task(self.async_refresh())
+
+    @core.callback
+    def async_cancel(self):
+        """Stop refreshing, when unloading, before the client is closed.
+
+        The refreshes requested, scheduled or started in the background are
+        cancelled, and one already triggered does not reach the API.
+        """
+        self._unloaded = True
+        self._debounced_refresh.async_cancel()
+        self._unschedule_refresh()
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    @core.callback
+    def _schedule_refresh(self) -> None:
+        if not self._unloaded:
+            super()._schedule_refresh()
+
+    def _snapshot(self, items) -> Snapshot:
+        # The client returns the very same list while the payload is unchanged.
+        if items is self._items:
+            return self.data
+        self._items = items
+        return Snapshot.build(items)
+
+    def _compute_update_interval(self) -> timedelta:
+        return compute_update_interval(
+            self._api.rate_limit, reserve=self._reserve, default=self._default_interval
+        )
+
+    async def _async_update_data(self) -> Any:
+        if self._unloaded:
+            raise UpdateFailed(f"{self.name} is unloaded")
+        try:
+            data = await self._async_fetch()
+            self.stale = False
+            return data
+        except NatureRemoError as e:
+            raise UpdateFailed(e) from e
+        finally:
+            # The next refresh is scheduled from update_interval after this
+            # returns, also when the update failed (e.g. with 429).
+            self.update_interval = self._compute_update_interval() + self._offset
+            self._offset = timedelta(0)
+            LOGGER.debug(
+                "Next %s in %s (%s)",
+                self.name,
+                self.update_interval,
+                self._api.rate_limit,
+            )
+
+
+class NatureRemoApplianceCoordinator(NatureRemoUpdateCoordinator):
+    """Coordinator for the appliance list (settings, signals, smart meters).
+
+    `update_interval` is the interval of a list of signals and lights only.
+    With an AC or a smart meter, the list is fetched every minute (or
+    `update_interval` if shorter), slower only for the rate limit.
+    """
+
+    def __init__(
+            self,
+            hass: core.HomeAssistant,
+            api: NatureRemoAPIVer1,
+            update_interval: timedelta = DEFAULT_APPLIANCE_UPDATE_INTERVAL,
+            reserve: int = DEFAULT_RATE_LIMIT_RESERVE,
+            offset: timedelta = timedelta(0),
+    ):
+        super().__init__(
+            hass, api, "Nature Remo appliances update", update_interval, reserve, offset
+        )
+        self._live = False
+
+    async def _async_fetch(self) -> Snapshot[ApplianceRecord]:
+        LOGGER.debug("Trying to fetch appliance list from API.")
+        snapshot = self._snapshot(await self._api.get_appliance_records())
+        self._live = any(appliance.type in LIVE_APPLIANCE_TYPES for appliance in snapshot)
+        return snapshot
+
+    def _compute_update_interval(self) -> timedelta:
+        interval = self._default_interval
+        if self._live:
+            interval = max(min(interval, DEFAULT_UPDATE_INTERVAL), MIN_UPDATE_INTERVAL)
+        # Never faster than the interval, so that the devices keep their share
+        # of the budget.
+        return compute_update_interval(
+            self._api.rate_limit,
+            reserve=self._reserve,
+            default=interval,
+            minimum=interval,
+            maximum=max(interval, MAX_UPDATE_INTERVAL),
+        )
+
+
+class NatureRemoDeviceCoordinator(NatureRemoUpdateCoordinator):
+    """Coordinator for the device list (newest sensor events)."""
+
+    def __init__(
+            self,
+            hass: core.HomeAssistant,
+            api: NatureRemoAPIVer1,
+            reserve: int = DEFAULT_RATE_LIMIT_RESERVE,
+            offset: timedelta = timedelta(0),
+    ):
+        # Keep one request of each window for the appliance coordinator.
+        super().__init__(
+            hass, api, "Nature Remo devices update", DEFAULT_UPDATE_INTERVAL, reserve + 1,
+            offset,
+        )
+
+    async def _async_fetch(self) -> Snapshot[DeviceRecord]:
+        LOGGER.debug("Trying to fetch device list from API.")
+        return self._snapshot(await self._api.get_device_records())
@@ -0,0 +1,59 @@
+"""Filtering of the sensor readings worth a state write."""
+from __future__ import annotations
+
+import time
+from typing import Hashable, NamedTuple, Optional
+
+
+class Deadband(NamedTuple):
+    # Smallest change worth a write, in the unit of the sensor.
+    absolute: float = 0.0
+    # Smallest change worth a write, relative to the value last written.
+    relative: float = 0.0
+
+    def exceeded(self, last: float, value: float) -> bool:
+        """Whether `value` is out of the band around `last`; the wider of the
+        two thresholds applies."""
+        return abs(value - last) >= max(self.absolute, self.relative * abs(last))
+
+
+class StateFilter:
+    """Tell if a reading is worth a state write: it left the deadband around
+    the value last written, or nothing was written for `max_silence` seconds.
+
+    The band follows the value written, not the readings, so a value
+    drifting slowly is written once it is a band away, and jitter around a
+    value is never written. A change of `key` (e.g. assumed state) is always
+    written.
+    """
+
+    __slots__ = ("deadband", "max_silence", "_value", "_key", "_written_at")
+
+    def __init__(self, deadband: Deadband, max_silence: float):
+        self.deadband = deadband
+        self.max_silence = max_silence
+        self._value: Optional[float] = None
+        self._key: Hashable = None
+        self._written_at: Optional[float] = None
+
+    def should_write(self, value, key: Hashable = None, now: Optional[float] = None) -> bool:
+        """Tell if `value` is worth a write, and remember it if so."""
+        if now is None:
+            now = time.monotonic()
+        if not (
+                self._written_at is None
+                or key != self._key
+                or now - self._written_at >= self.max_silence
+                or not _comparable(self._value, value)
+                or self.deadband.exceeded(self._value, value)
+        ):
+            return False
+        self._value = value
+        self._key = key
+        self._written_at = now
+        return True
+
+
+def _comparable(last, value) -> bool:
+    # Unknown and non-numeric values are written on each change.
+    return isinstance(last, (int, float)) and isinstance(value, (int, float))
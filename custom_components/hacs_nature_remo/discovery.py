@@ -0,0 +1,77 @@
+"""Entities following the items of a coordinator."""
+from __future__ import annotations
+
+from typing import Callable, Dict, Generic, List, Optional, TypeVar
+
+from homeassistant import core
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import LOGGER
+from .coordinator import NatureRemoUpdateCoordinator
+from .snapshot import Snapshot
+
+T = TypeVar('T')
+
+
+class EntityDiscovery(Generic[T]):
+    """Add the entities of the items a refresh brought, and remove those of
+    the items it no longer has.
+
+    Only the ids of the items are compared, once per snapshot. `build`
+    returns the entities of an item, none for the items of other platforms.
+    """
+
+    def __init__(
+            self,
+            hass: core.HomeAssistant,
+            coordinator: NatureRemoUpdateCoordinator,
+            async_add_entities: AddEntitiesCallback,
+            build: Callable[[T], List[Entity]],
+    ):
+        self._hass = hass
+        self._coordinator = coordinator
+        self._async_add_entities = async_add_entities
+        self._build = build
+        self._entities: Dict[str, List[Entity]] = {}
+        self._data: Optional[Snapshot[T]] = None
+
+    @core.callback
+    def async_start(self) -> core.CALLBACK_TYPE:
+        """Add the entities of the current items, then follow the refreshes.
+
+        Returns the function to stop following them.
+        """
+        self._async_update()
+        return self._coordinator.async_add_listener(self._async_update)
+
+    @core.callback
+    def _async_update(self):
+        data = self._coordinator.data
+        if data is self._data:
+            return
+        self._data = data
+        added = []
+        for item in data:
+            if item.id not in self._entities:
+                self._entities[item.id] = entities = self._build(item)
+                added.extend(entities)
+        if added:
+            LOGGER.debug("Adding %d entities", len(added))
+            self._async_add_entities(added)
+        for _id in self._entities.keys() - data.by_id.keys():
+            for entity in self._entities.pop(_id):
+                self._async_remove(entity)
+
+    @core.callback
+    def _async_remove(self, entity: Entity):
+        if entity.hass is None:
+            # It was never added, e.g. for a duplicated unique id.
+            return
+        LOGGER.debug("Removing %s, its item is gone", entity.entity_id)
+        if entity.registry_entry is not None:
+            # Removes the entity as well.
+            er.async_get(self._hass).async_remove(entity.entity_id)
+        else:
+            self._hass.async_create_task(entity.async_remove())
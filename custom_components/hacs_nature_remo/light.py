@@ -5,13 +5,15 @@ from typing import List
 
 from homeassistant.components.light import LightEntity
 from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from remo import Appliance, Signal
 import voluptuous as vol
 
-from . import DOMAIN, NatureRemoAPIVer1, NatureRemoBase
+from . import DOMAIN, NatureRemoAPIVer1, NatureRemoSignalBase
+from .api.records import ApplianceRecord
 from .const import *
-from .utils import find_by
+from .discovery import EntityDiscovery
+from .transmit import TransmitScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,22 +35,22 @@ class LightButton(Enum):
     color_temp_down = "colortemp-down"
 
 
-async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
+async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the Nature Remo Light."""
-    if discovery_info is None:
-        return
     _LOGGER.debug("Setting up light platform.")
-    _data = hass.data.get(DOMAIN)
-    coordinator = hass.data.get(KEY_COORDINATOR)
-    appliances: List[Appliance] = coordinator.data.get(KEY_APPLIANCES)
+    _data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = _data.get(KEY_COORDINATOR).get(KEY_APPLIANCES)
     api = _data.get(KEY_API)
+    transmitter = _data.get(KEY_TRANSMITTER)
     config = _data.get(KEY_CONFIG)
-    async_add_entities(
-        [
-            NatureRemoLight(coordinator, api, appliance, config)
-            for appliance in appliances
-            if appliance.type == "LIGHT"
-        ]
+
+    def build(appliance: ApplianceRecord) -> List[Entity]:
+        if appliance.type != "LIGHT":
+            return []
+        return [NatureRemoLight(coordinator, api, transmitter, appliance, config)]
+
+    entry.async_on_unload(
+        EntityDiscovery(hass, coordinator, async_add_entities, build).async_start()
     )
     platform = entity_platform.current_platform.get()
     _LOGGER.debug("Registering light entity services.")
@@ -64,18 +66,17 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     )
 
 
-class NatureRemoLight(NatureRemoBase, LightEntity):
+class NatureRemoLight(NatureRemoSignalBase, LightEntity):
     """Implementation of a Nature Remo Light component."""
 
-    def __init__(self, coordinator: DataUpdateCoordinator, api: NatureRemoAPIVer1, appliance: Appliance,
-                 config):
+    def __init__(self, coordinator: DataUpdateCoordinator, api: NatureRemoAPIVer1,
+                 transmitter: TransmitScheduler, appliance: ApplianceRecord, config):
         super().__init__(coordinator, appliance)
         self._api = api
-        self._buttons = appliance.light.buttons
-        self._signals = appliance.signals
+        self._transmitter = transmitter
+        self._buttons = appliance.light_buttons
         self._is_night = False
         # self._buttons = [b["name"] for b in appliance["light"]["buttons"]]
-        # self._signals = {s["name"]: s["id"] for s in appliance["signals"]}
         self._attr_is_on = False
         self._attr_supported_features = 0
         self._attr_extra_state_attributes = {ATTR_IS_NIGHT: self._is_night}
@@ -104,7 +105,9 @@ class NatureRemoLight(NatureRemoBase, LightEntity):
 
     # own methods
     async def _post(self, button):
-        await self._api.send_light_infrared_signal(self._appliance_id, button)
+        await self._transmitter.run(
+            self._device_id, self._api.send_light_infrared_signal, self._appliance_id, button
+        )
 
     async def async_press_light_button(self, service_call):
         button = LightButton(service_call.data["button_name"])
@@ -117,10 +120,10 @@ class NatureRemoLight(NatureRemoBase, LightEntity):
 
     async def async_press_custom_button(self, service_call):
         signal_name = service_call.data["button_name"]
-        signal_id = find_by(self._signals, 'name', signal_name).id
+        signal = self._signals.by_name.get(signal_name)
 
-        if signal_id is None:
+        if signal is None:
             _LOGGER.error(f"Invalid signal name: {signal_name}")
             return
-        await self._api.send_signal(signal_id)
+        await self._transmitter.run(self._device_id, self._api.send_signal, signal.id)
         self._update(True)
@@ -1,90 +1,192 @@
 """Platform for sensor integration."""
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Dict, Hashable, List, Optional
 
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     DEVICE_CLASS_HUMIDITY,
     DEVICE_CLASS_ILLUMINANCE,
-    DEVICE_CLASS_POWER,
     DEVICE_CLASS_TEMPERATURE,
+    ELECTRIC_CURRENT_AMPERE,
+    ENERGY_KILO_WATT_HOUR,
     LIGHT_LUX,
     PERCENTAGE,
     POWER_WATT,
     TEMP_CELSIUS,
 )
+from homeassistant.core import callback
 from homeassistant.helpers.entity import DeviceInfo, Entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.typing import DiscoveryInfoType, HomeAssistantType
+from homeassistant.helpers.typing import HomeAssistantType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from remo.models import Appliance
+from homeassistant.util import dt as dt_util
 
 from . import NatureRemoBase, NatureRemoDeviceBase
+from .api.records import ApplianceRecord, DeviceRecord, SensorEvent
 from .const import *
-from .utils import find_by
+from .deadband import Deadband, StateFilter
+from .discovery import EntityDiscovery
+from .timeseries import RingSeries
+
+ATTR_MEAN = "mean"
+ATTR_MIN = "min"
+ATTR_MAX = "max"
+ATTR_SAMPLES = "samples"
+ATTR_ENERGY = "energy_kwh"
 
 
-async def async_setup_platform(
+async def async_setup_entry(
         hass: HomeAssistantType,
-        config,
+        entry: ConfigEntry,
         async_add_entities: AddEntitiesCallback,
-        discovery_info: DiscoveryInfoType | None = None
 ) -> None:
     """Set up the sensor platform."""
-    # We only want this platform to be set up via discovery.
-    if discovery_info is None:
-        return
     LOGGER.debug("Setting up sensor platform.")
-    _data = hass.data.get(DOMAIN)
-    coordinator = _data.get(KEY_COORDINATOR)
-    appliances = coordinator.data.get(KEY_APPLIANCES)
-    devices = coordinator.data.get(KEY_DEVICES)
-    entities: List[Entity] = [
-        NatureRemoE(coordinator, appliance)
-        for appliance in appliances
-        if appliance.type == "EL_SMART_METER"
-    ]
-    # async_add_entities(sensors, update_before_add=True)
-    for device in devices:
+    _data = hass.data[DOMAIN][entry.entry_id]
+    coordinators = _data.get(KEY_COORDINATOR)
+    appliance_coordinator = coordinators.get(KEY_APPLIANCES)
+    device_coordinator = coordinators.get(KEY_DEVICES)
+    conf = _data[KEY_CONFIG]
+
+    def build_appliance(appliance: ApplianceRecord) -> List[Entity]:
+        if appliance.type != "EL_SMART_METER":
+            return []
+        entities: List[Entity] = [
+            NatureRemoE(appliance_coordinator, appliance, state_filter(conf, SENSOR_POWER)),
+            NatureRemoEnergySensor(appliance_coordinator, appliance, "normal_energy"),
+        ]
+        # Only the meters of sites selling electricity report the reverse
+        # energy, and not all report the current.
+        if appliance.meter is not None and appliance.meter.reverse_energy is not None:
+            entities.append(
+                NatureRemoEnergySensor(appliance_coordinator, appliance, "reverse_energy")
+            )
+        if appliance.meter is not None and appliance.meter.current is not None:
+            entities.append(NatureRemoCurrentSensor(
+                appliance_coordinator, appliance, state_filter(conf, SENSOR_CURRENT)
+            ))
+        return entities
+
+    def build_device(device: DeviceRecord) -> List[Entity]:
+        entities: List[Entity] = []
         for sensor in device.newest_events.keys():
             if sensor == "te":
-                entities.append(NatureRemoTemperatureSensor(coordinator, device))
+                entities.append(NatureRemoTemperatureSensor(
+                    device_coordinator, device, state_filter(conf, SENSOR_TEMPERATURE)
+                ))
             elif sensor == "hu":
-                entities.append(NatureRemoHumiditySensor(coordinator, device))
+                entities.append(NatureRemoHumiditySensor(
+                    device_coordinator, device, state_filter(conf, SENSOR_HUMIDITY)
+                ))
             elif sensor == "il":
-                entities.append(NatureRemoIlluminanceSensor(coordinator, device))
-    async_add_entities(entities)
+                entities.append(NatureRemoIlluminanceSensor(
+                    device_coordinator, device, state_filter(conf, SENSOR_ILLUMINANCE)
+                ))
+        return entities
+
+    for coordinator, build in (
+            (appliance_coordinator, build_appliance),
+            (device_coordinator, build_device),
+    ):
+        entry.async_on_unload(
+            EntityDiscovery(hass, coordinator, async_add_entities, build).async_start()
+        )
+
+
+def state_filter(conf: Dict[str, Any], sensor_type: str) -> StateFilter:
+    """Return a filter with the deadband configured for `sensor_type` over
+    the default one."""
+    deadband = {**DEFAULT_DEADBANDS[sensor_type], **conf[CONF_DEADBANDS].get(sensor_type, {})}
+    return StateFilter(
+        Deadband(deadband[CONF_ABSOLUTE], deadband[CONF_RELATIVE]),
+        conf[CONF_MAX_SILENCE].total_seconds(),
+    )
+
+
+def _add_sample(series: RingSeries, measured_at: Optional[str], value) -> bool:
+    measured = dt_util.parse_datetime(measured_at) if measured_at else None
+    if measured is None or value is None:
+        return False
+    return series.add(measured.timestamp(), value)
+
+
+def _series_attributes(series: RingSeries) -> Dict[str, Any]:
+    """Mean, min and max of the last readings."""
+    if not series:
+        return {}
+    return {
+        ATTR_MEAN: round(series.mean, 2),
+        ATTR_MIN: series.min,
+        ATTR_MAX: series.max,
+        ATTR_SAMPLES: len(series),
+    }
+
+
+class _FilteredSensor:
+    """Sensor writing its state only when its value is worth it, see
+    `StateFilter`. Without a filter, every change is written."""
+
+    _state_filter: Optional[StateFilter] = None
+
+    def _worth_writing(self, value) -> bool:
+        if self._state_filter is None:
+            return True
+        # Leaving or entering the assumed state of a warm start is always
+        # written.
+        return self._state_filter.should_write(value, self.assumed_state)
+
+
+class NatureRemoSmartMeterSensor(NatureRemoBase, _FilteredSensor, SensorEntity):
+    """Sensor reporting one of the readings of a Nature Remo E.
 
+    The readings are decoded once per refresh into `ApplianceRecord.meter`.
+    """
 
-class NatureRemoE(NatureRemoBase):
-    """Implementation of a Nature Remo E sensor."""
+    _reading_key: str
 
-    def __init__(self, coordinator: DataUpdateCoordinator, appliance: Appliance):
+    def __init__(self, coordinator: DataUpdateCoordinator, appliance: ApplianceRecord,
+                 state_filter: Optional[StateFilter] = None):
         super().__init__(coordinator, appliance)
-        self._unit_of_measurement = POWER_WATT
-        self._attr_device_class = DEVICE_CLASS_POWER
+        self._state_filter = state_filter
+
+    def _reading(self):
+        appliance: ApplianceRecord = self._coordinator.data.get(self._appliance_id)
+        if appliance is None or appliance.meter is None:
+            return None
+        return getattr(appliance.meter, self._reading_key)
 
     @property
-    def state(self):
+    def native_value(self):
         """Return the state of the sensor."""
-        appliances: List[Appliance] = self._coordinator.data.get(KEY_APPLIANCES)
-        appliance = find_by(appliances, "id", self._appliance_id)
-        if hasattr(appliance, 'smart_meter'):
-            smart_meter = appliance.smart_meter
-            echonetlite_properties = smart_meter["echonetlite_properties"]
-            measured_instantaneous = next(
-                value.val for value in echonetlite_properties if value["epc"] == 231
-            )
-            LOGGER.debug("Current state: %sW", measured_instantaneous)
-            return measured_instantaneous
-        return "No state"
+        return self._reading()
+
+    def _fingerprint(self) -> Hashable:
+        """Return the reading the state depends on."""
+        return self._reading()
 
     async def async_added_to_hass(self):
         """Subscribe to updates."""
+        self._has_changed(KEY_APPLIANCES, self._fingerprint())
+        # The state written when the entity was added.
+        self._worth_writing(self._reading())
         self.async_on_remove(
-            self._coordinator.async_add_listener(self.async_write_ha_state)
+            self._coordinator.async_add_listener(self._handle_coordinator_update)
         )
 
+    @callback
+    def _handle_coordinator_update(self):
+        if (
+                self._has_changed(KEY_APPLIANCES, self._fingerprint())
+                and self._worth_writing(self._reading())
+        ):
+            self.async_write_ha_state()
+
     async def async_update(self):
         """Update the entity.
         Only used by the generic entity update service.
@@ -92,55 +194,162 @@ class NatureRemoE(NatureRemoBase):
         await self._coordinator.async_request_refresh()
 
 
-class NatureRemoTemperatureSensor(NatureRemoDeviceBase):
-    """Implementation of a Nature Remo sensor."""
+class NatureRemoE(NatureRemoSmartMeterSensor):
+    """Implementation of a Nature Remo E sensor.
+
+    The power measured since the start is integrated into `energy_kwh`.
+    """
+
+    _reading_key = "power"
+
+    def __init__(self, coordinator: DataUpdateCoordinator, appliance: ApplianceRecord,
+                 state_filter: Optional[StateFilter] = None):
+        super().__init__(coordinator, appliance, state_filter)
+        self._attr_native_unit_of_measurement = POWER_WATT
+        self._attr_device_class = SensorDeviceClass.POWER
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._series = RingSeries(SERIES_SIZE)
+        self._add_reading()
+
+    def _add_reading(self):
+        appliance: ApplianceRecord = self._coordinator.data.get(self._appliance_id)
+        if appliance is not None and appliance.meter is not None:
+            _add_sample(self._series, appliance.meter.updated_at, appliance.meter.power)
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        attributes = _series_attributes(self._series)
+        if attributes:
+            # Wh to kWh
+            attributes[ATTR_ENERGY] = round(self._series.integral / 1000, 4)
+        return attributes
+
+    @callback
+    def _handle_coordinator_update(self):
+        self._add_reading()
+        super()._handle_coordinator_update()
+
+
+class NatureRemoCurrentSensor(NatureRemoSmartMeterSensor):
+    """Instantaneous current measured by a Nature Remo E."""
+
+    _reading_key = "current"
+
+    def __init__(self, coordinator: DataUpdateCoordinator, appliance: ApplianceRecord,
+                 state_filter: Optional[StateFilter] = None):
+        super().__init__(coordinator, appliance, state_filter)
+        self._attr_name = f"Nature Remo {appliance.nickname} Current"
+        self._attr_unique_id = f"{appliance.id}-current"
+        self._attr_native_unit_of_measurement = ELECTRIC_CURRENT_AMPERE
+        self._attr_device_class = SensorDeviceClass.CURRENT
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+
+
+class NatureRemoEnergySensor(NatureRemoSmartMeterSensor):
+    """Cumulative energy measured by a Nature Remo E, for the energy
+    dashboard.
 
-    def __init__(self, coordinator, appliance):
+    `reading_key` is "normal_energy" (bought) or "reverse_energy" (sold).
+    """
+
+    def __init__(self, coordinator: DataUpdateCoordinator, appliance: ApplianceRecord,
+                 reading_key: str):
         super().__init__(coordinator, appliance)
-        self._attr_name = f"Nature Remo {self._device.name} Temperature"
-        self._attr_unique_id = self._device.id + "-te"
-        self._attr_unit_of_measurement = TEMP_CELSIUS
-        self._attr_device_class = DEVICE_CLASS_TEMPERATURE
+        self._reading_key = reading_key
+        direction = "Reverse" if reading_key == "reverse_energy" else "Normal"
+        self._attr_name = f"Nature Remo {appliance.nickname} {direction} Energy"
+        self._attr_unique_id = f"{appliance.id}-{reading_key}"
+        self._attr_native_unit_of_measurement = ENERGY_KILO_WATT_HOUR
+        self._attr_device_class = SensorDeviceClass.ENERGY
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+
+class NatureRemoEventSensor(NatureRemoDeviceBase, _FilteredSensor):
+    """Sensor reporting one of the newest events of a Nature Remo device."""
+
+    _event_key: str
+
+    def __init__(self, coordinator: DataUpdateCoordinator, device: DeviceRecord,
+                 state_filter: Optional[StateFilter] = None):
+        super().__init__(coordinator, device)
+        self._state_filter = state_filter
+        self._series = RingSeries(SERIES_SIZE)
+        self._add_event()
+
+    def _add_event(self):
+        event = self._event()
+        if event is not None:
+            _add_sample(self._series, event.created_at, event.val)
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        return _series_attributes(self._series)
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        # The state written when the entity was added.
+        self._worth_writing(self.state)
+
+    @callback
+    def _handle_coordinator_update(self):
+        self._add_event()
+        if self._has_changed(KEY_DEVICES, self._fingerprint()) and self._worth_writing(self.state):
+            self.async_write_ha_state()
+
+    def _event(self) -> SensorEvent | None:
+        device: DeviceRecord = self._coordinator.data.get(self._device.id)
+        if device is None:
+            return None
+        return device.newest_events.get(self._event_key)
+
+    def _fingerprint(self) -> Hashable:
+        event = self._event()
+        if event is None:
+            return None
+        return event.created_at, event.val
 
     @property
     def state(self):
         """Return the state of the sensor."""
-        devices: List[Appliance] = self._coordinator.data.get(KEY_DEVICES)
-        device = find_by(devices, "id", self._device.id)
-        return device.newest_events.get("te").val
+        event = self._event()
+        return None if event is None else event.val
 
 
-class NatureRemoHumiditySensor(NatureRemoDeviceBase):
+class NatureRemoTemperatureSensor(NatureRemoEventSensor):
     """Implementation of a Nature Remo sensor."""
 
-    def __init__(self, coordinator, appliance):
-        super().__init__(coordinator, appliance)
+    _event_key = "te"
+
+    def __init__(self, coordinator, appliance, state_filter=None):
+        super().__init__(coordinator, appliance, state_filter)
+        self._attr_name = f"Nature Remo {self._device.name} Temperature"
+        self._attr_unique_id = self._device.id + "-te"
+        self._attr_unit_of_measurement = TEMP_CELSIUS
+        self._attr_device_class = DEVICE_CLASS_TEMPERATURE
+
+
+class NatureRemoHumiditySensor(NatureRemoEventSensor):
+    """Implementation of a Nature Remo sensor."""
+
+    _event_key = "hu"
+
+    def __init__(self, coordinator, appliance, state_filter=None):
+        super().__init__(coordinator, appliance, state_filter)
         self._attr_name = f"Nature Remo {self._device.name} Humidity"
         self._attr_unique_id = self._device.id + "-hu"
         self._attr_unit_of_measurement = PERCENTAGE
         self._attr_device_class = DEVICE_CLASS_HUMIDITY
 
-    @property
-    def state(self):
-        """Return the state of the sensor."""
-        devices: List[Appliance] = self._coordinator.data.get(KEY_DEVICES)
-        device = find_by(devices, "id", self._device.id)
-        return device.newest_events.get("hu").val
-
 
-class NatureRemoIlluminanceSensor(NatureRemoDeviceBase):
+class NatureRemoIlluminanceSensor(NatureRemoEventSensor):
     """Implementation of a Nature Remo sensor."""
 
-    def __init__(self, coordinator: DataUpdateCoordinator, appliance: Appliance):
-        super().__init__(coordinator, appliance)
+    _event_key = "il"
+
+    def __init__(self, coordinator: DataUpdateCoordinator, appliance: DeviceRecord,
+                 state_filter: Optional[StateFilter] = None):
+        super().__init__(coordinator, appliance, state_filter)
         self._attr_name = f"Nature Remo {self._device.name} Illuminance"
         self._attr_unique_id = self._device.id + "-il"
         self._attr_unit_of_measurement = LIGHT_LUX
         self._attr_device_class = DEVICE_CLASS_ILLUMINANCE
-
-    @property
-    def state(self):
-        """Return the state of the sensor."""
-        devices: List[Appliance] = self._coordinator.data.get(KEY_DEVICES)
-        device = find_by(devices, "id", self._device.id)
-        return device.newest_events.get("il").val
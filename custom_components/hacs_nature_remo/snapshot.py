@@ -0,0 +1,33 @@
+"""Immutable, id-indexed coordinator data."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Generic, Iterable, Iterator, Mapping, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+@dataclass(frozen=True)
+class Snapshot(Generic[T]):
+    """Items of one refresh, in API order and indexed by their id."""
+
+    items: Tuple[T, ...] = ()
+    by_id: Mapping[str, T] = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def build(cls, items: Iterable[T]) -> Snapshot[T]:
+        items = tuple(items)
+        return cls(items, MappingProxyType({x.id: x for x in items}))
+
+    def get(self, _id: str) -> Optional[T]:
+        return self.by_id.get(_id)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __contains__(self, _id: object) -> bool:
+        return _id in self.by_id
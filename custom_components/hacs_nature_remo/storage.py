@@ -0,0 +1,82 @@
+"""Persistence of the last fetched snapshots, for a warm start."""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Mapping
+
+from homeassistant import core
+from homeassistant.helpers.storage import Store
+
+from .api.records import load_appliances, load_devices
+from .const import *
+from .coordinator import NatureRemoUpdateCoordinator
+from .snapshot import Snapshot
+
+LOADERS: Dict[str, Callable[[List[Dict[str, Any]]], list]] = {
+    KEY_APPLIANCES: load_appliances,
+    KEY_DEVICES: load_devices,
+}
+
+
+class SnapshotStore:
+    """Save the data of the coordinators after each refresh that changed it,
+    and restore it before the first one.
+
+    The items are stored as sent by the API, so that the records are built
+    again by the same loaders. Each account (`entry_id`) has its own file.
+    """
+
+    def __init__(
+            self,
+            hass: core.HomeAssistant,
+            coordinators: Mapping[str, NatureRemoUpdateCoordinator],
+            entry_id: str,
+    ):
+        self._store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry_id}")
+        self._coordinators = coordinators
+        self._saved: Dict[str, Snapshot] = {}
+        self._unsubscribes: List[Callable[[], None]] = []
+
+    async def async_restore(self) -> bool:
+        """Seed the coordinators with the stored snapshots, if there are any
+        for all of them."""
+        stored = await self._store.async_load()
+        if not stored:
+            return False
+        try:
+            snapshots = {
+                key: Snapshot.build(LOADERS[key](stored[key]))
+                for key in self._coordinators
+            }
+        except (KeyError, TypeError, ValueError) as e:
+            LOGGER.warning("Ignoring the stored Nature Remo snapshot: %r", e)
+            return False
+        for key, snapshot in snapshots.items():
+            self._coordinators[key].async_restore(snapshot)
+            self._saved[key] = snapshot
+        return True
+
+    @core.callback
+    def async_listen(self):
+        """Start saving the snapshots of the coordinators."""
+        for coordinator in self._coordinators.values():
+            self._unsubscribes.append(coordinator.async_add_listener(self._handle_update))
+
+    @core.callback
+    def async_unlisten(self):
+        while self._unsubscribes:
+            self._unsubscribes.pop()()
+
+    @core.callback
+    def _handle_update(self):
+        if all(
+                self._saved.get(key) is coordinator.data
+                for key, coordinator in self._coordinators.items()
+        ) or any(not coordinator.data for coordinator in self._coordinators.values()):
+            return
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @core.callback
+    def _data_to_save(self) -> Dict[str, List[Dict[str, Any]]]:
+        for key, coordinator in self._coordinators.items():
+            self._saved[key] = coordinator.data
+        return {key: [x.raw for x in snapshot] for key, snapshot in self._saved.items()}
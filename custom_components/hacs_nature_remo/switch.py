@@ -1,44 +1,46 @@
 """Support for Nature Remo AC."""
 import logging
-from typing import Any
+from typing import Any, List
 
 from homeassistant.components.switch import SwitchEntity
+from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from remo.models import Appliance
 
-from . import NatureRemoAPIVer1, NatureRemoBase
+from . import NatureRemoAPIVer1, NatureRemoSignalBase
+from .api.records import ApplianceRecord
 from .const import *
+from .discovery import EntityDiscovery
+from .transmit import TransmitScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def async_setup_platform(hass, config, async_add_entities, discovery_info=None) -> None:
+async def async_setup_entry(hass, entry, async_add_entities) -> None:
     """Set up the Nature Remo IR."""
-    if discovery_info is None:
-        return
     _LOGGER.debug("Setting up IR platform.")
-    _data = hass.data.get(DOMAIN)
-    coordinator = _data.get(KEY_COORDINATOR)
-    appliances = coordinator.data.get(KEY_APPLIANCES)
+    _data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = _data.get(KEY_COORDINATOR).get(KEY_APPLIANCES)
     api = _data.get(KEY_API)
-    config = _data.get(KEY_CONFIG)
-    async_add_entities(
-        [
-            NatureRemoIR(coordinator, api, appliance, config)
-            for appliance in appliances
-            if appliance.type == "IR"
-        ]
+    transmitter = _data.get(KEY_TRANSMITTER)
+
+    def build(appliance: ApplianceRecord) -> List[Entity]:
+        if appliance.type != "IR":
+            return []
+        return [NatureRemoIR(coordinator, api, transmitter, appliance)]
+
+    entry.async_on_unload(
+        EntityDiscovery(hass, coordinator, async_add_entities, build).async_start()
     )
 
 
-class NatureRemoIR(NatureRemoBase, SwitchEntity):
+class NatureRemoIR(NatureRemoSignalBase, SwitchEntity):
     """Implementation of a Nature Remo IR."""
 
-    def __init__(self, coordinator: DataUpdateCoordinator, api: NatureRemoAPIVer1, appliance: Appliance) -> None:
+    def __init__(self, coordinator: DataUpdateCoordinator, api: NatureRemoAPIVer1,
+                 transmitter: TransmitScheduler, appliance: ApplianceRecord) -> None:
         super().__init__(coordinator, appliance)
         self._api = api
-        # self._signals = {s["name"]: s["id"] for s in appliance["signals"]}
-        self._signals = appliance.signals
+        self._transmitter = transmitter
         self._attr_is_on = False
         self._attr_assumed_state = True
 
@@ -70,16 +72,17 @@ class NatureRemoIR(NatureRemoBase, SwitchEntity):
         except OSError:
             _LOGGER.debug("Cannot find off signal")
 
-    async def _post_icon(self, names: [str]) -> None:
-        images = [x.image for x in self._signals]
-        for name in names:
-            if name in images:
-                await self._post(self._signals[images.index(name)].id)
+    async def _post_icon(self, images: [str]) -> None:
+        """Send the first signal with one of `images`, in their order."""
+        for image in images:
+            signal = self._signals.by_image.get(image)
+            if signal is not None:
+                await self._post(signal.id)
                 break
 
     async def _post(self, signal: str) -> None:
         _LOGGER.debug("Send Signals using signal: %s, signal")
-        response = await self._api.send_signal(signal)
+        response = await self._transmitter.run(self._device_id, self._api.send_signal, signal)
         self.async_write_ha_state()
 
     # this is not used because async_turn_off is overridden
@@ -0,0 +1,87 @@
+"""In-memory series of the last readings of a sensor."""
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+
+class RingSeries:
+    """The last `size` samples of a sensor, in arrays used as a ring buffer.
+
+    A sample not newer than the last one (the same event seen by another
+    refresh) is dropped. The mean, min and max of the samples kept, and the
+    integral over time of all samples added, are updated with each sample in
+    O(1) (amortized for min and max) instead of being computed over the
+    series.
+    """
+
+    __slots__ = (
+        "_times", "_values", "_size", "_count", "_added", "_sum", "_mins", "_maxs", "integral",
+    )
+
+    def __init__(self, size: int):
+        self._times = array("d", bytes(8 * size))
+        self._values = array("d", bytes(8 * size))
+        self._size = size
+        self._count = 0
+        # Samples added since the start, the next one goes to _added % size.
+        self._added = 0
+        self._sum = 0.0
+        # (sample number, value) of the candidates for the min and the max of
+        # the samples kept, with increasing and decreasing values.
+        self._mins: Deque[Tuple[int, float]] = deque()
+        self._maxs: Deque[Tuple[int, float]] = deque()
+        # Trapezoidal integral of the values over hours, e.g. Wh for W.
+        self.integral = 0.0
+
+    def add(self, timestamp: float, value: float) -> bool:
+        """Add a sample measured at `timestamp` (seconds). Returns if it was
+        new."""
+        value = float(value)
+        last = self.last
+        if last is not None and timestamp <= last[0]:
+            return False
+        index = self._added % self._size
+        if self._count == self._size:
+            self._sum -= self._values[index]
+        else:
+            self._count += 1
+        if last is not None:
+            self.integral += (last[1] + value) / 2 * (timestamp - last[0]) / 3600
+        self._times[index] = timestamp
+        self._values[index] = value
+        self._sum += value
+
+        oldest = self._added - self._count + 1
+        for candidates, keep in ((self._mins, float.__lt__), (self._maxs, float.__gt__)):
+            while candidates and not keep(candidates[-1][1], value):
+                candidates.pop()
+            candidates.append((self._added, value))
+            while candidates[0][0] < oldest:
+                candidates.popleft()
+        self._added += 1
+        return True
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def last(self) -> Optional[Tuple[float, float]]:
+        """The (timestamp, value) of the newest sample."""
+        if not self._count:
+            return None
+        index = (self._added - 1) % self._size
+        return self._times[index], self._values[index]
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._sum / self._count if self._count else None
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._mins[0][1] if self._mins else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._maxs[0][1] if self._maxs else None
@@ -0,0 +1,76 @@
+"""Per-Remo scheduling of infrared transmissions."""
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, field
+import time
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from .const import DEFAULT_IR_SIGNAL_GAP, LOGGER
+
+T = TypeVar('T')
+
+
+@dataclass
+class TransmitStats:
+    """Debug counters of the queue of one Remo."""
+
+    sent: int = 0
+    depth: int = 0
+    max_depth: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    @property
+    def mean_wait_seconds(self) -> float:
+        return self.wait_seconds / self.sent if self.sent else 0.0
+
+
+@dataclass
+class _RemoQueue:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_sent: float = float("-inf")
+
+
+class TransmitScheduler:
+    """Serialize commands sent through the same Remo, `gap` seconds apart.
+
+    Commands for different Remos run concurrently.
+    """
+
+    def __init__(self, gap: float = DEFAULT_IR_SIGNAL_GAP):
+        self._gap = gap
+        self._queues: Dict[str, _RemoQueue] = defaultdict(_RemoQueue)
+        self.stats: Dict[str, TransmitStats] = defaultdict(TransmitStats)
+
+    async def run(
+            self, device_id: str, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any
+    ) -> T:
+        """Await `func(*args, **kwargs)` once it is the turn of `device_id`."""
+        queue = self._queues[device_id]
+        stats = self.stats[device_id]
+        stats.depth += 1
+        stats.max_depth = max(stats.max_depth, stats.depth)
+        enqueued = time.monotonic()
+        try:
+            async with queue.lock:
+                delay = queue.last_sent + self._gap - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                waited = time.monotonic() - enqueued
+                stats.sent += 1
+                stats.wait_seconds += waited
+                stats.max_wait_seconds = max(stats.max_wait_seconds, waited)
+                LOGGER.debug(
+                    "Sending through %s after %.3f s (queue depth %d)",
+                    device_id,
+                    waited,
+                    stats.depth,
+                )
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    queue.last_sent = time.monotonic()
+        finally:
+            stats.depth -= 1
@@ -1,4 +1,6 @@
-from typing import Any, Iterable, TypeVar
+from typing import Any, Dict, Iterable, Tuple, TypeVar
+
+from .api.records import SignalRecord
 
 T = TypeVar('T')
 
@@ -9,3 +11,21 @@ def find_by(items: Iterable[T], attr: str, value: Any = None) -> T:
             return x
     else:
         x = None
+
+
+class SignalIndex:
+    """Signals of an appliance by image and by name.
+
+    Like a search through `signals`, the first signal of an image or name
+    wins.
+    """
+
+    __slots__ = ("signals", "by_image", "by_name")
+
+    def __init__(self, signals: Tuple[SignalRecord, ...]):
+        self.signals = signals
+        self.by_image: Dict[str, SignalRecord] = {}
+        self.by_name: Dict[str, SignalRecord] = {}
+        for signal in signals:
+            self.by_image.setdefault(signal.image, signal)
+            self.by_name.setdefault(signal.name, signal)
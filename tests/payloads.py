@@ -0,0 +1,65 @@
+"""Synthetic Nature Remo API payloads for the tests and the benchmarks."""
+from typing import Any, Dict, List
+
+
+def device_json(i: int) -> Dict[str, Any]:
+    """Return the i-th device, with its newest events."""
+    return {
+        "id": f"device-{i}",
+        "name": f"Remo {i}",
+        "temperature_offset": 0,
+        "humidity_offset": 0,
+        "created_at": "2022-01-01T00:00:00Z",
+        "updated_at": "2022-01-01T00:00:00Z",
+        "firmware_version": "Remo/1.8.0",
+        "mac_address": "00:00:00:00:00:00",
+        "serial_number": f"1W{i:08d}",
+        "newest_events": {
+            "te": {"val": 20 + i % 10, "created_at": "2022-06-01T00:00:00Z"},
+            "hu": {"val": 40 + i % 20, "created_at": "2022-06-01T00:00:00Z"},
+            "il": {"val": 100 + i, "created_at": "2022-06-01T00:00:00Z"},
+        },
+    }
+
+
+def aircon_json() -> Dict[str, Any]:
+    """Return an aircon range with the same modes and temperatures as an AC."""
+    temps = [""] + [f"{t / 2:g}" for t in range(32, 61)]
+    mode = {"temp": temps, "vol": ["auto", "1", "2", "3", "4", "5"], "dir": ["auto", "swing", "1", "2"]}
+    return {
+        "range": {
+            "modes": {m: mode for m in ("cool", "warm", "dry", "blow", "auto")},
+            "fixedButtons": ["power-off"],
+        },
+        "tempUnit": "c",
+    }
+
+
+def appliance_json(i: int, devices: int = 10) -> Dict[str, Any]:
+    """Return the i-th appliance, an AC with 10 signals on one of `devices` devices."""
+    device = device_json(i % devices)
+    del device["newest_events"]
+    return {
+        "id": f"appliance-{i}",
+        "device": device,
+        "model": None,
+        "nickname": f"Appliance {i}",
+        "image": "ico_ac_1",
+        "type": "AC",
+        "settings": {"temp": "26", "mode": "cool", "vol": "auto", "dir": "auto", "button": ""},
+        "aircon": aircon_json(),
+        "signals": [
+            {"id": f"signal-{i}-{j}", "name": f"Signal {j}", "image": "ico_io"}
+            for j in range(10)
+        ],
+    }
+
+
+def appliances_json(count: int, devices: int = 10) -> List[Dict[str, Any]]:
+    """Return `count` appliances spread over `devices` devices."""
+    return [appliance_json(i, devices) for i in range(count)]
+
+
+def devices_json(count: int) -> List[Dict[str, Any]]:
+    """Return `count` devices."""
+    return [device_json(i) for i in range(count)]
@@ -0,0 +1,223 @@
+"""Test the Nature Remo API client."""
+import asyncio
+import json
+import time
+
+from custom_components.hacs_nature_remo.api import (
+    HTTPWrapper,
+    NatureRemoAPIVer1,
+    Response,
+    build_error_message,
+)
+from custom_components.hacs_nature_remo.api.dispatcher import (
+    Priority,
+    RequestDispatcher,
+)
+
+DEVICES = [
+    {
+        "id": "device-1",
+        "name": "Remo",
+        "temperature_offset": 0,
+        "humidity_offset": 0,
+        "created_at": "2022-01-01T00:00:00Z",
+        "updated_at": "2022-01-01T00:00:00Z",
+        "firmware_version": "Remo/1.8.0",
+        "mac_address": "00:00:00:00:00:00",
+        "serial_number": "1W000001",
+        "newest_events": {
+            "te": {"val": 24.5, "created_at": "2022-06-01T00:00:00Z"},
+        },
+    }
+]
+
+
+class FakeResponse(Response):
+    """Response with `body` encoded as JSON."""
+
+    def __init__(self, body, status=200, headers=None):
+        """Initialize with the body, status and headers to answer."""
+        self._body = json.dumps(body).encode()
+        self._status = status
+        self._headers = headers or {}
+
+    @property
+    def headers(self):
+        """Return the headers."""
+        return self._headers
+
+    @property
+    def status_code(self):
+        """Return the status."""
+        return self._status
+
+    @property
+    def reason(self):
+        """Return no reason."""
+        return None
+
+    async def json(self):
+        """Return the decoded body."""
+        return json.loads(self._body)
+
+    async def read(self) -> bytes:
+        """Return the encoded body."""
+        return self._body
+
+    @property
+    def ok(self):
+        """Return if the status is not an error."""
+        return self._status < 400
+
+
+class FakeWrapper(HTTPWrapper):
+    """Answer every request with the next of `responses`."""
+
+    def __init__(self, *responses: FakeResponse):
+        """Initialize with the responses to answer, in order."""
+        self.responses = list(responses)
+        self.requests = []
+
+    async def get(self, url, headers=None) -> Response:
+        """Record the request and answer the next response."""
+        self.requests.append(("GET", url, headers))
+        return self.responses.pop(0)
+
+    async def post(self, url, headers=None, data=None) -> Response:
+        """Record the request and answer the next response."""
+        self.requests.append(("POST", url, data))
+        return self.responses.pop(0)
+
+
+async def test_unchanged_payload_is_not_deserialized():
+    """Test the previous result is reused for a byte-identical body."""
+    api = NatureRemoAPIVer1(FakeWrapper(FakeResponse(DEVICES), FakeResponse(DEVICES)), "token")
+    first = await api.get_devices()
+    second = await api.get_devices()
+    assert second is first
+    stats = api.stats["/1/devices"]
+    assert (stats.requests, stats.decoded, stats.unchanged) == (2, 1, 1)
+
+
+async def test_changed_payload_is_deserialized():
+    """Test a changed body is loaded again."""
+    changed = json.loads(json.dumps(DEVICES))
+    changed[0]["newest_events"]["te"]["val"] = 25.0
+    api = NatureRemoAPIVer1(FakeWrapper(FakeResponse(DEVICES), FakeResponse(changed)), "token")
+    await api.get_devices()
+    devices = await api.get_devices()
+    assert devices[0].newest_events["te"].val == 25.0
+    assert api.stats["/1/devices"].decoded == 2
+
+
+async def test_not_modified():
+    """Test If-None-Match is sent and a 304 reuses the previous result."""
+    wrapper = FakeWrapper(
+        FakeResponse(DEVICES, headers={"ETag": '"v1"'}),
+        FakeResponse(None, status=304),
+    )
+    api = NatureRemoAPIVer1(wrapper, "token")
+    first = await api.get_devices()
+    assert await api.get_devices() is first
+    assert wrapper.requests[1][2]["If-None-Match"] == '"v1"'
+    assert api.stats["/1/devices"].not_modified == 1
+
+
+async def test_update_aircon_settings_returns_settings():
+    """Test the resulting aircon settings are parsed from the response."""
+    settings = {"temp": "26", "mode": "cool", "vol": "auto", "dir": "auto", "button": ""}
+    wrapper = FakeWrapper(FakeResponse(settings))
+    api = NatureRemoAPIVer1(wrapper, "token")
+    result = await api.update_aircon_settings("ac-1", temperature="26")
+    assert (result.temp, result.mode) == ("26", "cool")
+    assert wrapper.requests == [
+        ("POST", "https://api.nature.global/1/appliances/ac-1/aircon_settings", {"temperature": "26"})
+    ]
+
+
+async def test_concurrent_gets_are_coalesced():
+    """Test concurrent calls of one endpoint share one request."""
+    wrapper = FakeWrapper(FakeResponse(DEVICES), FakeResponse(DEVICES))
+    api = NatureRemoAPIVer1(wrapper, "token")
+    first, second = await asyncio.gather(api.get_devices(), api.get_devices())
+    assert first is second
+    assert len(wrapper.requests) == 1
+    stats = api.stats["/1/devices"]
+    assert (stats.requests, stats.coalesced) == (1, 1)
+    # The next call after completion makes a new request.
+    await api.get_devices()
+    assert len(wrapper.requests) == 2
+
+
+async def test_loaders_of_an_endpoint_share_a_request():
+    """Test the models and the records of one endpoint share one request."""
+    wrapper = FakeWrapper(FakeResponse(DEVICES))
+    api = NatureRemoAPIVer1(wrapper, "token")
+    devices, records = await asyncio.gather(api.get_devices(), api.get_device_records())
+    assert len(wrapper.requests) == 1
+    assert devices[0].id == records[0].id == "device-1"
+    stats = api.stats["/1/devices"]
+    assert (stats.requests, stats.coalesced, stats.decoded) == (1, 1, 2)
+
+
+async def test_poll_is_deferred_within_reserve():
+    """Test polls reuse the previous result once only the reserve is left."""
+    reset = str(int(time.time()) + 300)
+    wrapper = FakeWrapper(
+        FakeResponse(DEVICES, headers={"X-Rate-Limit-Remaining": "2", "X-Rate-Limit-Reset": reset}),
+        FakeResponse(None),
+    )
+    api = NatureRemoAPIVer1(wrapper, "token", reserve=2)
+    first = await api.get_devices()
+    assert await api.get_devices() is first
+    assert len(wrapper.requests) == 1
+    assert api.stats["/1/devices"].deferred == 1
+    # Commands still use the reserve.
+    await api.send_signal("signal-1")
+    assert len(wrapper.requests) == 2
+
+
+async def test_commands_go_before_polls():
+    """Test a waiting command is sent before polls queued earlier."""
+    order = []
+    release = asyncio.Event()
+    dispatcher = RequestDispatcher(max_concurrency=2)
+
+    async def request(name):
+        order.append(name)
+        await release.wait()
+
+    busy = asyncio.ensure_future(dispatcher.run(Priority.POLL, request, "poll-1"))
+    await asyncio.sleep(0)
+    polls = [
+        asyncio.ensure_future(dispatcher.run(Priority.CATALOG, request, "catalog")),
+        asyncio.ensure_future(dispatcher.run(Priority.POLL, request, "poll-2")),
+    ]
+    await asyncio.sleep(0)
+    # The slot kept for commands is free.
+    command = asyncio.ensure_future(dispatcher.run(Priority.COMMAND, request, "command"))
+    await asyncio.sleep(0)
+    assert order == ["poll-1", "command"]
+    release.set()
+    await asyncio.gather(busy, command, *polls)
+    assert order == ["poll-1", "command", "poll-2", "catalog"]
+
+
+async def test_decode_time_is_split():
+    """Test parsing and loading times are reported separately."""
+    api = NatureRemoAPIVer1(FakeWrapper(FakeResponse(DEVICES)), "token")
+    await api.get_devices()
+    stats = api.stats["/1/devices"]
+    assert stats.json_seconds > 0 and stats.load_seconds > 0
+    assert stats.decode_seconds == stats.json_seconds + stats.load_seconds
+
+
+async def test_error_message_of_non_json_body():
+    """Test an error page which is not JSON still gives a message."""
+    resp = FakeResponse(None, status=502)
+    resp._body = b"<html>Bad Gateway</html>"
+    assert await build_error_message(resp) == (
+        "HTTP Status Code: 502, Response: <html>Bad Gateway</html>"
+    )
+    resp = FakeResponse({"code": 401001, "message": "Unauthorized"}, status=401)
+    assert "Nature Remo Code: 401001" in await build_error_message(resp)
@@ -0,0 +1,119 @@
+"""Test the climate platform helpers."""
+import asyncio
+from functools import partial
+
+from remo.models import AirConParams
+
+from custom_components.hacs_nature_remo.api.records import AirConMode
+from custom_components.hacs_nature_remo.climate.buffer import AirConSettingsBuffer
+from custom_components.hacs_nature_remo.climate.capabilities import (
+    NO_CAPABILITIES,
+    compile_modes,
+)
+
+
+class FakeAPI:
+    """Record the aircon settings sent and answer them back."""
+
+    def __init__(self):
+        """Initialize with no calls."""
+        self.calls = []
+
+    async def update_aircon_settings(self, appliance, **data):
+        """Record the settings and return them as the new ones."""
+        self.calls.append((appliance, data))
+        await asyncio.sleep(0)
+        return AirConParams(
+            temp=data.get("temperature", ""),
+            mode=data.get("operation_mode", ""),
+            vol=data.get("air_volume", ""),
+            dir=data.get("air_direction", ""),
+            button=data.get("button", ""),
+        )
+
+
+async def test_settings_are_merged():
+    """Test settings posted together are sent in one request."""
+    api = FakeAPI()
+    buffer = AirConSettingsBuffer(partial(api.update_aircon_settings, "ac-1"))
+    results = await asyncio.gather(
+        buffer.post({"operation_mode": "cool"}),
+        buffer.post({"temperature": "25"}),
+        buffer.post({"temperature": "26", "air_volume": "auto"}),
+    )
+    assert api.calls == [
+        ("ac-1", {"operation_mode": "cool", "temperature": "26", "air_volume": "auto"})
+    ]
+    assert results[0] is results[1] is results[2]
+
+
+async def test_mode_cancels_power_off():
+    """Test choosing a mode after turning off does not send power-off."""
+    api = FakeAPI()
+    buffer = AirConSettingsBuffer(partial(api.update_aircon_settings, "ac-1"))
+    await asyncio.gather(
+        buffer.post({"button": "power-off"}),
+        buffer.post({"operation_mode": "warm"}),
+    )
+    assert api.calls == [("ac-1", {"operation_mode": "warm"})]
+
+
+async def test_sequential_settings_are_sent_at_once():
+    """Test each awaited post is sent without waiting for more settings."""
+    api = FakeAPI()
+    buffer = AirConSettingsBuffer(partial(api.update_aircon_settings, "ac-1"))
+    first = buffer.post({"temperature": "25"})
+    await asyncio.sleep(0)
+    assert [data for _, data in api.calls] == [{"temperature": "25"}]
+    await first
+    await buffer.post({"temperature": "27"})
+    assert [data for _, data in api.calls] == [
+        {"temperature": "25"},
+        {"temperature": "27"},
+    ]
+
+
+async def test_settings_posted_while_sending_are_merged():
+    """Test settings posted during a request are sent together after it."""
+    api = FakeAPI()
+    buffer = AirConSettingsBuffer(partial(api.update_aircon_settings, "ac-1"))
+    first = buffer.post({"temperature": "25"})
+    await asyncio.sleep(0)
+    second = buffer.post({"air_volume": "1"})
+    third = buffer.post({"air_direction": "swing"})
+    results = await asyncio.gather(first, second, third)
+    assert [data for _, data in api.calls] == [
+        {"temperature": "25"},
+        {"air_volume": "1", "air_direction": "swing"},
+    ]
+    assert results[1] is results[2]
+
+
+async def test_explicit_settings_win_over_defaults():
+    """Test the temperature of a mode does not override one set explicitly."""
+    api = FakeAPI()
+    buffer = AirConSettingsBuffer(partial(api.update_aircon_settings, "ac-1"))
+    await asyncio.gather(
+        buffer.post({"temperature": "25"}),
+        buffer.post({"operation_mode": "cool"}, {"temperature": 27}),
+    )
+    await buffer.post({"operation_mode": "warm"}, {"temperature": 22})
+    assert [data for _, data in api.calls] == [
+        {"temperature": "25", "operation_mode": "cool"},
+        {"temperature": 22, "operation_mode": "warm"},
+    ]
+
+
+def test_capabilities_of_modes():
+    """Test the temperature range and step, fan and swing modes of each mode."""
+    capabilities = compile_modes({
+        "cool": AirConMode(("", "18", "18.5", "19"), ("auto", "1"), ("swing",)),
+        "blow": AirConMode(("",), ("auto",), ()),
+    })
+    cool = capabilities["cool"]
+    assert (cool.min_temp, cool.max_temp, cool.step) == (18.0, 19.0, 0.5)
+    assert cool.temps == (18.0, 18.5, 19.0)
+    assert (cool.fan_modes, cool.swing_modes) == (("auto", "1"), ("swing",))
+    blow = capabilities["blow"]
+    assert (blow.min_temp, blow.max_temp, blow.step) == (0, 0, 1)
+    assert capabilities.get("power-off", NO_CAPABILITIES) is NO_CAPABILITIES
@@ -0,0 +1,98 @@
+"""Test the config flow."""
+from unittest.mock import patch
+
+from homeassistant import config_entries, data_entry_flow
+from homeassistant.const import CONF_ACCESS_TOKEN
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from remo import NatureRemoError
+from remo.models import User
+
+from custom_components.hacs_nature_remo.const import (
+    CONF_APPLIANCE_UPDATE_INTERVAL,
+    CONF_TRANSPORT,
+    DOMAIN,
+    TRANSPORT_HTTPX,
+)
+
+VALIDATE = "custom_components.hacs_nature_remo.config_flow.validate_access_token"
+
+
+async def test_user_step(hass, enable_custom_integrations):
+    """Test an entry is created for a valid token, and an error is shown otherwise."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+
+    with patch(VALIDATE, side_effect=NatureRemoError("401")):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_ACCESS_TOKEN: "bad"}
+        )
+    assert result["errors"] == {"base": "invalid_auth"}
+
+    with patch(VALIDATE, return_value=User("user-1", "Alice")), patch(
+            "custom_components.hacs_nature_remo.async_setup_entry", return_value=True
+    ):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_ACCESS_TOKEN: "good"}
+        )
+        await hass.async_block_till_done()
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert result["title"] == "Alice"
+    assert result["data"] == {CONF_ACCESS_TOKEN: "good"}
+
+
+async def test_import_updates_the_entry(hass, enable_custom_integrations):
+    """Test the YAML configuration is imported once, then kept in sync."""
+    with patch("custom_components.hacs_nature_remo.async_setup_entry", return_value=True):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_IMPORT},
+            data={CONF_ACCESS_TOKEN: "token", CONF_APPLIANCE_UPDATE_INTERVAL: 300},
+        )
+        assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_IMPORT},
+            data={CONF_ACCESS_TOKEN: "new-token"},
+        )
+        await hass.async_block_till_done()
+    assert result["type"] == data_entry_flow.RESULT_TYPE_ABORT
+    entry, = hass.config_entries.async_entries(DOMAIN)
+    assert entry.data == {CONF_ACCESS_TOKEN: "new-token"}
+
+
+async def test_options_keep_the_account(hass, enable_custom_integrations):
+    """Test a new token is only accepted for the account of the entry."""
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_ACCESS_TOKEN: "token"}, unique_id="user-1")
+    entry.add_to_hass(hass)
+    with patch("custom_components.hacs_nature_remo.async_setup_entry", return_value=True):
+        result = await hass.config_entries.options.async_init(entry.entry_id)
+        with patch(VALIDATE, return_value=User("user-2", "Bob")):
+            result = await hass.config_entries.options.async_configure(
+                result["flow_id"], {CONF_ACCESS_TOKEN: "other"}
+            )
+        assert result["type"] == data_entry_flow.RESULT_TYPE_ABORT
+        assert result["reason"] == "wrong_account"
+
+        result = await hass.config_entries.options.async_init(entry.entry_id)
+        with patch(VALIDATE, return_value=User("user-1", "Alice")):
+            result = await hass.config_entries.options.async_configure(
+                result["flow_id"], {CONF_ACCESS_TOKEN: "renewed"}
+            )
+        await hass.async_block_till_done()
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert entry.options[CONF_ACCESS_TOKEN] == "renewed"
+
+
+async def test_options_reject_a_missing_transport(hass, enable_custom_integrations):
+    """Test the httpx client cannot be picked without its packages."""
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_ACCESS_TOKEN: "token"})
+    entry.add_to_hass(hass)
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    with patch("custom_components.hacs_nature_remo.config_flow.find_spec", return_value=None):
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"], {CONF_ACCESS_TOKEN: "token", CONF_TRANSPORT: TRANSPORT_HTTPX}
+        )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["errors"] == {CONF_TRANSPORT: "transport_unavailable"}
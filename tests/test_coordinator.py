@@ -0,0 +1,95 @@
+"""Test the update coordinator."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from custom_components.hacs_nature_remo.api import NatureRemoAPIVer1, RateLimit
+from custom_components.hacs_nature_remo.const import (
+    DEFAULT_APPLIANCE_UPDATE_INTERVAL,
+    DEFAULT_UPDATE_INTERVAL,
+    MAX_UPDATE_INTERVAL,
+    MIN_UPDATE_INTERVAL,
+)
+from custom_components.hacs_nature_remo.coordinator import (
+    NatureRemoApplianceCoordinator,
+    NatureRemoDeviceCoordinator,
+    NatureRemoUpdateCoordinator,
+    compute_update_interval,
+)
+
+from .payloads import appliance_json
+from .test_api import DEVICES, FakeResponse, FakeWrapper
+
+NOW = datetime(2022, 6, 1, 12, 0, 0)
+
+
+def _rate_limit(remaining: int, reset_in: int) -> RateLimit:
+    return RateLimit(
+        checked_at=NOW,
+        limit=30,
+        remaining=remaining,
+        reset=NOW + timedelta(seconds=reset_in),
+    )
+
+
+def test_interval_without_rate_limit():
+    """Test the default interval is used before the first response."""
+    assert compute_update_interval(RateLimit()) == DEFAULT_UPDATE_INTERVAL
+
+
+def test_interval_with_headroom():
+    """Test polling speeds up while the budget allows it."""
+    interval = compute_update_interval(_rate_limit(30, 300), reserve=10)
+    assert MIN_UPDATE_INTERVAL <= interval < DEFAULT_UPDATE_INTERVAL
+
+
+def test_interval_backs_off():
+    """Test polling slows down as the remaining budget runs low."""
+    interval = compute_update_interval(_rate_limit(14, 280), reserve=10)
+    assert DEFAULT_UPDATE_INTERVAL < interval <= MAX_UPDATE_INTERVAL
+
+
+def test_interval_keeps_reserve():
+    """Test no poll is made before reset once only the reserve is left."""
+    interval = compute_update_interval(_rate_limit(10, 600), reserve=10)
+    assert interval == timedelta(seconds=601)
+
+
+def test_coordinator_without_fetch(hass):
+    """Test a coordinator which does not fetch anything cannot be created."""
+
+    class NoFetchCoordinator(NatureRemoUpdateCoordinator):
+        pass
+
+    with pytest.raises(TypeError):
+        NoFetchCoordinator(hass, None, "none", DEFAULT_UPDATE_INTERVAL, 0)
+
+
+async def test_cancelled_coordinator_does_not_fetch(hass):
+    """Test no refresh reaches the API once the coordinator is cancelled."""
+    wrapper = FakeWrapper(FakeResponse(DEVICES))
+    coordinator = NatureRemoDeviceCoordinator(hass, NatureRemoAPIVer1(wrapper, "token"))
+    coordinator.async_start_refresh()
+    coordinator.async_cancel()
+    await hass.async_block_till_done()
+    await coordinator.async_refresh()
+    assert not wrapper.requests
+    assert not coordinator.last_update_success
+
+
+@pytest.mark.parametrize(
+    "appliance_type, interval",
+    [
+        ("EL_SMART_METER", DEFAULT_UPDATE_INTERVAL),
+        ("AC", DEFAULT_UPDATE_INTERVAL),
+        ("IR", DEFAULT_APPLIANCE_UPDATE_INTERVAL),
+    ],
+)
+async def test_appliance_interval(hass, appliance_type, interval):
+    """Test the appliances are polled like the devices if their state can change."""
+    appliance = dict(appliance_json(0), type=appliance_type)
+    wrapper = FakeWrapper(FakeResponse([appliance]))
+    coordinator = NatureRemoApplianceCoordinator(hass, NatureRemoAPIVer1(wrapper, "token"))
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.update_interval == interval
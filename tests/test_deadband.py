@@ -0,0 +1,27 @@
+"""Test the filtering of the sensor state writes."""
+from custom_components.hacs_nature_remo.deadband import Deadband, StateFilter
+
+
+def test_jitter_is_not_written():
+    """Test only the readings out of the band around the last written are written."""
+    state_filter = StateFilter(Deadband(absolute=10, relative=0.05), max_silence=600)
+    assert state_filter.should_write(500, now=0)
+    # 5% of 500 W is wider than 10 W.
+    assert not state_filter.should_write(520, now=1)
+    assert not state_filter.should_write(480, now=2)
+    assert state_filter.should_write(525, now=3)
+    assert state_filter.should_write(3000, now=4)
+    assert not state_filter.should_write(3100, now=5)
+    assert state_filter.should_write(2800, now=6)
+
+
+def test_heartbeat_and_key_are_written():
+    """Test a reading in the band is written after max_silence, or with a new key."""
+    state_filter = StateFilter(Deadband(absolute=0.2), max_silence=600)
+    assert state_filter.should_write(24.5, now=0)
+    assert not state_filter.should_write(24.6, now=599)
+    assert state_filter.should_write(24.6, now=600)
+    assert state_filter.should_write(24.6, key=True, now=601)
+    assert not state_filter.should_write(24.7, key=True, now=602)
+    assert state_filter.should_write(None, key=True, now=603)
+    assert state_filter.should_write(24.7, key=True, now=604)
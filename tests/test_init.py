@@ -1,9 +1,239 @@
 """Test component setup."""
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_ACCESS_TOKEN
+from homeassistant.helpers.entity import Entity
 from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.hacs_nature_remo.api import HTTPWrapper, Response
+from custom_components.hacs_nature_remo.const import (
+    CONF_IR_SIGNAL_GAP,
+    DOMAIN,
+    KEY_API,
+    KEY_APPLIANCES,
+    KEY_COORDINATOR,
+    KEY_DEVICES,
+)
+
+from .payloads import appliances_json, devices_json
+from .test_api import FakeResponse
+
+
+class CloudWrapper(HTTPWrapper):
+    """Answer like the cloud with `appliances` ACs on one Remo."""
+
+    def __init__(self, appliances: int = 2):
+        """Initialize with `appliances` ACs and no other appliances."""
+        self.appliances = appliances
+        self.others = []
+        self.devices = devices_json(1)
+        self.posted = []
+
+    async def get(self, url, headers=None) -> Response:
+        """Answer the appliances or the devices."""
+        if url.endswith("/appliances"):
+            return FakeResponse(appliances_json(self.appliances, devices=1) + self.others)
+        return FakeResponse(self.devices)
 
-from custom_components.hacs_nature_remo.const import DOMAIN
+    async def post(self, url, headers=None, data=None) -> Response:
+        """Record the URL posted to."""
+        self.posted.append(url)
+        return FakeResponse({})
 
 
-async def test_async_setup(hass):
+async def test_async_setup(hass, enable_custom_integrations):
     """Test the component gets setup."""
     assert await async_setup_component(hass, DOMAIN, {}) is True
+
+
+async def test_setup_reload_and_unload_entry(hass, enable_custom_integrations):
+    """Test an entry is set up, reloaded with new options and unloaded."""
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_ACCESS_TOKEN: "token"})
+    entry.add_to_hass(hass)
+    close = AsyncMock()
+    with patch(
+            "custom_components.hacs_nature_remo._create_transport",
+            side_effect=lambda conf: (CloudWrapper(), close),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        assert entry.state is ConfigEntryState.LOADED
+        assert hass.states.get("climate.nature_remo_appliance_1") is not None
+        api = hass.data[DOMAIN][entry.entry_id][KEY_API]
+
+        hass.config_entries.async_update_entry(
+            entry, options={CONF_ACCESS_TOKEN: "new-token", CONF_IR_SIGNAL_GAP: 1.0},
+        )
+        await hass.async_block_till_done()
+        assert close.await_count == 1
+        assert hass.data[DOMAIN][entry.entry_id][KEY_API] is not api
+        assert hass.data[DOMAIN][entry.entry_id][KEY_API].access_token == "new-token"
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+    assert entry.state is ConfigEntryState.NOT_LOADED
+    assert entry.entry_id not in hass.data[DOMAIN]
+    assert close.await_count == 2
+
+
+async def test_accounts_are_set_up_separately(hass, enable_custom_integrations):
+    """Test each account has its own client and polls at its own offset."""
+    entries = [
+        MockConfigEntry(domain=DOMAIN, data={CONF_ACCESS_TOKEN: token}, unique_id=token)
+        for token in ("token-1", "token-2")
+    ]
+    for entry in entries:
+        entry.add_to_hass(hass)
+    with patch(
+            "custom_components.hacs_nature_remo._create_transport",
+            side_effect=lambda conf: (CloudWrapper(), AsyncMock()),
+    ):
+        # Setting up the component sets up all its entries.
+        assert await async_setup_component(hass, DOMAIN, {})
+        await hass.async_block_till_done()
+        first, second = (hass.data[DOMAIN][entry.entry_id] for entry in entries)
+        assert first[KEY_API].access_token == "token-1"
+        assert second[KEY_API].access_token == "token-2"
+        intervals = [
+            data[KEY_COORDINATOR][KEY_DEVICES].update_interval for data in (first, second)
+        ]
+        assert intervals[1] - intervals[0] == timedelta(seconds=30)
+        for entry in entries:
+            assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+
+async def test_appliances_are_added_and_removed(hass, enable_custom_integrations):
+    """Test a refresh adds the entities of new appliances and removes gone ones."""
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_ACCESS_TOKEN: "token"})
+    entry.add_to_hass(hass)
+    cloud = CloudWrapper()
+    with patch(
+            "custom_components.hacs_nature_remo._create_transport",
+            side_effect=lambda conf: (cloud, AsyncMock()),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id][KEY_COORDINATOR][KEY_APPLIANCES]
+        assert len(hass.states.async_entity_ids("climate")) == 2
+
+        cloud.appliances = 3
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        assert hass.states.get("climate.nature_remo_appliance_2") is not None
+
+        cloud.appliances = 1
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        assert hass.states.async_entity_ids("climate") == ["climate.nature_remo_appliance_0"]
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+
+async def test_appliance_without_device(hass, enable_custom_integrations):
+    """Test an appliance sent without its Remo does not fail the refresh."""
+    orphan = appliances_json(1)[0]
+    orphan.update(id="orphan-1", nickname="Orphan")
+    del orphan["device"]
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_ACCESS_TOKEN: "token"})
+    entry.add_to_hass(hass)
+    cloud = CloudWrapper()
+    cloud.others = [orphan]
+    with patch(
+            "custom_components.hacs_nature_remo._create_transport",
+            side_effect=lambda conf: (cloud, AsyncMock()),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        assert hass.states.get("climate.nature_remo_orphan") is not None
+        assert len(hass.states.async_entity_ids("climate")) == 3
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+
+async def test_learned_signals_are_sent(hass, enable_custom_integrations, caplog):
+    """Test a signal learned after the setup can be sent by name."""
+    light = appliances_json(1, devices=1)[0]
+    light.update(id="light-1", nickname="Light", type="LIGHT", light={"buttons": []})
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_ACCESS_TOKEN: "token"})
+    entry.add_to_hass(hass)
+    cloud = CloudWrapper(0)
+    cloud.others.append(light)
+    with patch(
+            "custom_components.hacs_nature_remo._create_transport",
+            side_effect=lambda conf: (cloud, AsyncMock()),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        press = {"entity_id": "light.nature_remo_light", "button_name": "Night"}
+        await hass.services.async_call(DOMAIN, "press_custom_button", press, blocking=True)
+        assert "Invalid signal name: Night" in caplog.text
+        assert not cloud.posted
+
+        light["signals"].append({"id": "signal-night", "name": "Night", "image": "ico_night"})
+        coordinator = hass.data[DOMAIN][entry.entry_id][KEY_COORDINATOR][KEY_APPLIANCES]
+        await coordinator.async_refresh()
+        await hass.services.async_call(DOMAIN, "press_custom_button", press, blocking=True)
+        assert cloud.posted[-1].endswith("/1/signals/signal-night/send")
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+
+async def test_state_is_written_only_when_changed(hass, enable_custom_integrations):
+    """Test a refresh writes the state of the entities whose data changed only."""
+    meter = {
+        "id": "meter-1",
+        "nickname": "Meter",
+        "type": "EL_SMART_METER",
+        "device": appliances_json(1, devices=1)[0]["device"],
+        "smart_meter": {"echonetlite_properties": [
+            {"name": "measured_instantaneous", "epc": 231, "val": "500",
+             "updated_at": "2022-06-01T00:00:00Z"},
+        ]},
+    }
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_ACCESS_TOKEN: "token"})
+    entry.add_to_hass(hass)
+    cloud = CloudWrapper(1)
+    cloud.others.append(meter)
+    with patch(
+            "custom_components.hacs_nature_remo._create_transport",
+            side_effect=lambda conf: (cloud, AsyncMock()),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinators = hass.data[DOMAIN][entry.entry_id][KEY_COORDINATOR]
+
+        with patch.object(Entity, "async_write_ha_state", autospec=True) as write:
+            async def refresh():
+                write.reset_mock()
+                for coordinator in coordinators.values():
+                    await coordinator.async_refresh()
+                return {entity.entity_id for (entity,), _ in write.call_args_list}
+
+            assert await refresh() == set()
+
+            meter["smart_meter"]["echonetlite_properties"][0]["val"] = "600"
+            cloud.devices[0]["newest_events"]["te"]["val"] = 30
+            assert await refresh() == {
+                "sensor.nature_remo_meter",
+                "sensor.nature_remo_remo_0_temperature",
+                "climate.nature_remo_appliance_0",
+            }
+
+            # Entering and leaving the assumed state of a warm start.
+            sensors = {
+                "sensor.nature_remo_remo_0_temperature",
+                "sensor.nature_remo_remo_0_humidity",
+                "sensor.nature_remo_remo_0_illuminance",
+            }
+            write.reset_mock()
+            coordinators[KEY_DEVICES].stale = True
+            coordinators[KEY_DEVICES].async_update_listeners()
+            assert {entity.entity_id for (entity,), _ in write.call_args_list} == sensors
+            assert await refresh() == sensors
+            assert await refresh() == set()
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
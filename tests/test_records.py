@@ -0,0 +1,79 @@
+"""Test the compact records of the API payloads."""
+from custom_components.hacs_nature_remo.api.echonet import (
+    SmartMeterReading,
+    decode_smart_meter,
+)
+from custom_components.hacs_nature_remo.api.records import (
+    AirConSettings,
+    load_appliances,
+    load_devices,
+)
+
+from .payloads import appliances_json
+from .test_api import DEVICES
+
+
+def test_devices():
+    """Test the fields the sensors read."""
+    device, = load_devices(DEVICES)
+    assert (device.id, device.name, device.serial_number) == ("device-1", "Remo", "1W000001")
+    assert device.newest_events["te"].val == 24.5
+    assert device.raw == DEVICES[0]
+
+
+def test_appliances_share_devices_and_ranges():
+    """Test appliances of one Remo share its record and equal aircon ranges."""
+    data = appliances_json(20, devices=2)
+    appliances = load_appliances(data)
+    assert appliances[0].device is appliances[2].device
+    assert appliances[0].device is not appliances[1].device
+    assert appliances[0].aircon_modes is appliances[1].aircon_modes
+    assert appliances[0].aircon_modes["cool"].vol[0] == "auto"
+    assert appliances[0].settings == AirConSettings("26", "cool", "auto", "auto", "")
+    assert appliances[0].signals[0].id == "signal-0-0"
+    assert appliances[5].raw == data[5]
+
+
+def test_appliance_without_device():
+    """Test an appliance sent without its Remo has no device."""
+    data = appliances_json(2, devices=1)
+    del data[0]["device"]
+    data[1]["device"] = {"name": "no id"}
+    appliances = load_appliances(data + appliances_json(1))
+    assert [appliance.device for appliance in appliances[:2]] == [None, None]
+    assert appliances[2].device.id == "device-0"
+
+
+def test_smart_meter():
+    """Test the echonet lite properties the remo models drop are kept."""
+    appliance, = load_appliances([{
+        "id": "meter-1",
+        "type": "EL_SMART_METER",
+        "device": {"id": "device-1", "name": "Remo E"},
+        "smart_meter": {"echonetlite_properties": [
+            {"name": "measured_instantaneous", "epc": 231, "val": "500",
+             "updated_at": "2022-06-01T00:00:00Z"},
+        ]},
+    }])
+    assert appliance.smart_meter[0].epc == 231
+    assert appliance.smart_meter[0].val == "500"
+    assert appliance.aircon_modes is None
+
+
+def test_smart_meter_readings():
+    """Test the energy is scaled and the current of both phases is summed."""
+    properties = {0xD3: "2", 0xE0: "12345", 0xE1: "1", 0xE3: "10", 0xE7: "4294967096",
+                  0xE8: str(0x0032 << 16 | 0x7FFE)}
+    appliance, = load_appliances([{
+        "id": "meter-1",
+        "type": "EL_SMART_METER",
+        "device": {"id": "device-1", "name": "Remo E"},
+        "smart_meter": {"echonetlite_properties": [
+            {"name": "", "epc": epc, "val": val, "updated_at": ""}
+            for epc, val in properties.items()
+        ]},
+    }])
+    assert appliance.meter == SmartMeterReading(
+        power=-200, current=5.0, normal_energy=2469.0, reverse_energy=2.0, updated_at=""
+    )
+    assert decode_smart_meter({0xE7: "500"}) == SmartMeterReading(power=500)
@@ -0,0 +1,109 @@
+"""Test the retrying HTTP wrapper."""
+import asyncio
+
+import pytest
+from remo import NatureRemoError
+
+from custom_components.hacs_nature_remo.api.resilient import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientWrapper,
+)
+
+from .test_api import FakeResponse, FakeWrapper
+
+
+class FailingWrapper(FakeWrapper):
+    """Raise the responses which are exceptions."""
+
+    async def get(self, url, headers=None):
+        """Answer the next response, or raise it."""
+        resp = await super().get(url, headers)
+        if isinstance(resp, Exception):
+            raise resp
+        return resp
+
+
+async def test_get_is_retried():
+    """Test GETs are retried on connection errors and 5xx."""
+    inner = FailingWrapper(ConnectionResetError(), FakeResponse(None, status=503), FakeResponse([]))
+    wrapper = ResilientWrapper(inner, backoff=0.001)
+    resp = await wrapper.get("https://example.com")
+    assert resp.ok
+    assert len(inner.requests) == 3
+
+
+class TruncatedResponse(FakeResponse):
+    """Response whose connection drops in the middle of the body."""
+
+    def __init__(self):
+        """Initialize with no body."""
+        super().__init__(None)
+        self.released = False
+
+    async def read(self) -> bytes:
+        """Fail like a dropped connection."""
+        raise ConnectionResetError()
+
+    async def release(self):
+        """Record the release."""
+        self.released = True
+
+
+async def test_get_is_retried_on_truncated_body():
+    """Test a connection lost while reading the body is retried."""
+    truncated = TruncatedResponse()
+    inner = FakeWrapper(truncated, FakeResponse([]))
+    wrapper = ResilientWrapper(inner, backoff=0.001)
+    resp = await wrapper.get("https://example.com")
+    assert await resp.json() == []
+    assert truncated.released
+    assert len(inner.requests) == 2
+
+async def test_post_is_not_retried():
+    """Test a failed POST is returned, it may have been applied."""
+    inner = FakeWrapper(FakeResponse(None, status=503), FakeResponse(None))
+    wrapper = ResilientWrapper(inner, backoff=0.001)
+    resp = await wrapper.post("https://example.com")
+    assert resp.status_code == 503
+    assert len(inner.requests) == 1
+
+
+async def test_too_many_requests_waits_for_retry_after():
+    """Test a 429 is retried after Retry-After, unless past the deadline."""
+    inner = FakeWrapper(
+        FakeResponse(None, status=429, headers={"Retry-After": "0.01"}), FakeResponse(None)
+    )
+    assert (await ResilientWrapper(inner).post("https://example.com")).ok
+
+    inner = FakeWrapper(FakeResponse(None, status=429, headers={"Retry-After": "60"}))
+    resp = await ResilientWrapper(inner, deadline=1).get("https://example.com")
+    assert resp.status_code == 429
+
+
+async def test_timeout():
+    """Test a hung request is given up at the deadline."""
+
+    class HangingWrapper(FakeWrapper):
+        async def get(self, url, headers=None):
+            await asyncio.sleep(10)
+
+    wrapper = ResilientWrapper(HangingWrapper(), timeout=0.01, deadline=0.05, backoff=0.001)
+    with pytest.raises(NatureRemoError):
+        await wrapper.get("https://example.com")
+
+
+async def test_circuit_breaker():
+    """Test requests fail fast after repeated failures until recovery."""
+    inner = FailingWrapper(*(ConnectionResetError() for _ in range(2)), FakeResponse(None))
+    breaker = CircuitBreaker(failure_threshold=2, recovery_time=0.05)
+    wrapper = ResilientWrapper(inner, max_retries=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(NatureRemoError):
+            await wrapper.get("https://example.com")
+    with pytest.raises(CircuitOpenError):
+        await wrapper.get("https://example.com")
+    assert len(inner.requests) == 2
+    await asyncio.sleep(0.05)
+    assert (await wrapper.get("https://example.com")).ok
+    assert not breaker.is_open
@@ -0,0 +1,30 @@
+"""Test the coordinator snapshot."""
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.hacs_nature_remo.snapshot import Snapshot
+
+
+def test_snapshot_lookup():
+    """Test items are kept in order and indexed by id."""
+    items = [SimpleNamespace(id="b"), SimpleNamespace(id="a")]
+    snapshot = Snapshot.build(items)
+    assert list(snapshot) == items
+    assert snapshot.get("a") is items[1]
+    assert snapshot.get("c") is None
+    assert "b" in snapshot
+    assert len(snapshot) == 2
+
+
+def test_snapshot_is_immutable():
+    """Test a published snapshot cannot be modified by entities."""
+    snapshot = Snapshot.build([SimpleNamespace(id="a")])
+    with pytest.raises(TypeError):
+        snapshot.by_id["b"] = SimpleNamespace(id="b")
+
+
+def test_empty_snapshot():
+    """Test the snapshot used before the first refresh."""
+    assert Snapshot().get("a") is None
+    assert list(Snapshot()) == []
@@ -0,0 +1,52 @@
+"""Test the warm start from the stored snapshot."""
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.hacs_nature_remo.api import NatureRemoAPIVer1
+from custom_components.hacs_nature_remo.const import (
+    KEY_DEVICES,
+    STORAGE_KEY,
+    STORAGE_SAVE_DELAY,
+)
+from custom_components.hacs_nature_remo.coordinator import NatureRemoDeviceCoordinator
+from custom_components.hacs_nature_remo.storage import SnapshotStore
+
+from .test_api import DEVICES, FakeResponse, FakeWrapper
+
+KEY = f"{STORAGE_KEY}.entry-1"
+
+
+async def test_snapshot_is_saved_and_restored(hass, hass_storage):
+    """Test a refreshed snapshot is saved, then served as stale on restore."""
+    api = NatureRemoAPIVer1(FakeWrapper(FakeResponse(DEVICES)), "token")
+    coordinator = NatureRemoDeviceCoordinator(hass, api)
+    store = SnapshotStore(hass, {KEY_DEVICES: coordinator}, "entry-1")
+    assert not await store.async_restore()
+    store.async_listen()
+    await coordinator.async_refresh()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=STORAGE_SAVE_DELAY + 1))
+    await hass.async_block_till_done()
+    store.async_unlisten()
+    assert hass_storage[KEY]["data"][KEY_DEVICES] == DEVICES
+
+    api = NatureRemoAPIVer1(FakeWrapper(FakeResponse(DEVICES)), "token")
+    coordinator = NatureRemoDeviceCoordinator(hass, api)
+    assert await SnapshotStore(hass, {KEY_DEVICES: coordinator}, "entry-1").async_restore()
+    assert coordinator.stale
+    assert coordinator.data.get("device-1").newest_events["te"].val == 24.5
+    await coordinator.async_refresh()
+    assert not coordinator.stale
+
+
+async def test_broken_snapshot_is_ignored(hass, hass_storage):
+    """Test a snapshot that does not load falls back to a cold start."""
+    hass_storage[KEY] = {
+        "version": 1, "key": KEY, "data": {KEY_DEVICES: [{"name": "no id"}]}
+    }
+    api = NatureRemoAPIVer1(FakeWrapper(), "token")
+    coordinator = NatureRemoDeviceCoordinator(hass, api)
+    assert not await SnapshotStore(hass, {KEY_DEVICES: coordinator}, "entry-1").async_restore()
+    assert not coordinator.stale
+    assert not coordinator.data
@@ -0,0 +1,38 @@
+"""Test the ring buffer of sensor readings."""
+import random
+
+from custom_components.hacs_nature_remo.timeseries import RingSeries
+
+
+def test_duplicates_are_dropped():
+    """Test the same event seen by two refreshes is added once."""
+    series = RingSeries(4)
+    assert series.add(60, 20.0)
+    assert not series.add(60, 20.0)
+    assert not series.add(30, 19.0)
+    assert len(series) == 1
+    assert series.last == (60, 20.0)
+
+
+def test_statistics_of_the_samples_kept():
+    """Test the mean, min and max follow the window as samples are evicted."""
+    size = 5
+    series = RingSeries(size)
+    values = [random.uniform(-10, 10) for _ in range(50)]
+    for i, value in enumerate(values):
+        series.add(i * 60, value)
+        window = values[max(0, i + 1 - size):i + 1]
+        assert len(series) == len(window)
+        assert abs(series.mean - sum(window) / len(window)) < 1e-9
+        assert series.min == min(window)
+        assert series.max == max(window)
+
+
+def test_integral():
+    """Test the power is integrated over time with the trapezoidal rule."""
+    series = RingSeries(2)
+    series.add(0, 1000)
+    series.add(1800, 1000)
+    series.add(3600, 2000)
+    # 0.5 h at 1000 W, then 0.5 h from 1000 W to 2000 W
+    assert series.integral == 500 + 750
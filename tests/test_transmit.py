@@ -0,0 +1,36 @@
+"""Test the per-Remo transmit scheduler."""
+import asyncio
+import time
+
+from custom_components.hacs_nature_remo.transmit import TransmitScheduler
+
+
+async def test_same_remo_is_serialized():
+    """Test commands for one Remo are sent one after another with a gap."""
+    scheduler = TransmitScheduler(gap=0.05)
+    sent = []
+
+    async def send(name):
+        sent.append((name, time.monotonic()))
+        await asyncio.sleep(0)
+
+    await asyncio.gather(*(scheduler.run("remo-1", send, i) for i in range(3)))
+    assert [name for name, _ in sent] == [0, 1, 2]
+    assert all(b[1] - a[1] >= 0.045 for a, b in zip(sent, sent[1:]))
+    stats = scheduler.stats["remo-1"]
+    assert (stats.sent, stats.max_depth, stats.depth) == (3, 3, 0)
+    assert stats.max_wait_seconds >= 0.09
+
+
+async def test_different_remos_run_concurrently():
+    """Test a busy Remo does not delay another one."""
+    scheduler = TransmitScheduler(gap=1)
+    started = {}
+
+    async def send(name):
+        started[name] = time.monotonic()
+        await asyncio.sleep(0.05)
+
+    start = time.monotonic()
+    await asyncio.gather(scheduler.run("remo-1", send, "a"), scheduler.run("remo-2", send, "b"))
+    assert max(started.values()) - start < 0.04
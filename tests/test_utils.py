@@ -0,0 +1,17 @@
+"""Test the helpers."""
+from custom_components.hacs_nature_remo.api.records import SignalRecord
+from custom_components.hacs_nature_remo.utils import SignalIndex
+
+
+def test_signal_index():
+    """Test the first signal of an image or a name is found."""
+    signals = (
+        SignalRecord("signal-1", "Power", "ico_io"),
+        SignalRecord("signal-2", "Power", "ico_on"),
+        SignalRecord("signal-3", "Timer", "ico_io"),
+    )
+    index = SignalIndex(signals)
+    assert index.by_image["ico_io"].id == "signal-1"
+    assert index.by_image["ico_on"].id == "signal-2"
+    assert index.by_name["Power"].id == "signal-1"
+    assert index.by_name.get("Missing") is None
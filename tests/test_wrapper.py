@@ -0,0 +1,129 @@
+"""Test the HTTP wrappers."""
+import asyncio
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import pytest
+from remo import NatureRemoError
+
+from custom_components.hacs_nature_remo.api import NatureRemoAPIVer1
+from custom_components.hacs_nature_remo.api.wrapper import AioHttpWrapper
+
+from .test_api import DEVICES
+
+COMMANDS = 400
+
+
+async def test_commands_do_not_leak_connections(socket_enabled):
+    """Test the connections of commands go back to the pool.
+
+    The server sends the end of the body late, like a slow cloud would, so
+    unreleased responses keep their connection until then.
+    """
+    in_use = []
+
+    async def send(request):
+        in_use.append(len(connector._acquired))
+        resp = web.StreamResponse(headers={"Content-Type": "application/json"})
+        resp.enable_chunked_encoding()
+        await resp.prepare(request)
+        await resp.write(b"{")
+        await asyncio.sleep(0.01)
+        try:
+            await resp.write_eof(b"}")
+        except ConnectionError:
+            pass
+        return resp
+
+    app = web.Application()
+    app.router.add_post("/1/signals/{signal}/send", send)
+    server = TestServer(app)
+    await server.start_server()
+    connector = aiohttp.TCPConnector(limit=100)
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            api = NatureRemoAPIVer1(AioHttpWrapper(session), "token")
+            api.base_url = str(server.make_url("")).rstrip("/")
+            await asyncio.gather(*(api.send_signal(f"signal-{i}") for i in range(COMMANDS)))
+            assert not connector._acquired
+    finally:
+        await server.close()
+    assert len(in_use) == COMMANDS
+    # No more connections than requests the client sends at once.
+    assert max(in_use) <= 4
+
+
+async def test_commands_reuse_the_connection(socket_enabled):
+    """Test the connection of a command whose body is not read is reused."""
+    transports = []
+
+    async def send(request):
+        transports.append(request.transport)
+        resp = web.StreamResponse(headers={"Content-Type": "application/json"})
+        resp.enable_chunked_encoding()
+        await resp.prepare(request)
+        await resp.write(b"{")
+        await asyncio.sleep(0.01)
+        await resp.write_eof(b"}")
+        return resp
+
+    app = web.Application()
+    app.router.add_post("/1/signals/{signal}/send", send)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            api = NatureRemoAPIVer1(AioHttpWrapper(session), "token")
+            api.base_url = str(server.make_url("")).rstrip("/")
+            for i in range(5):
+                await api.send_signal(f"signal-{i}")
+    finally:
+        await server.close()
+    assert len(transports) == 5
+    assert len(set(map(id, transports))) == 1
+
+async def test_truncated_body_is_a_connection_error(socket_enabled):
+    """Test a connection lost in the middle of the body raises ConnectionError."""
+
+    async def truncated(request):
+        resp = web.StreamResponse(headers={"Content-Length": "100"})
+        await resp.prepare(request)
+        await resp.write(b"{")
+        request.transport.close()
+        return resp
+
+    app = web.Application()
+    app.router.add_get("/", truncated)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            resp = await AioHttpWrapper(session).get(str(server.make_url("/")))
+            with pytest.raises(ConnectionError):
+                await resp.read()
+    finally:
+        await server.close()
+
+async def test_httpx_wrapper():
+    """Test the client works over the httpx transport."""
+    httpx = pytest.importorskip("httpx")
+    from custom_components.hacs_nature_remo.api.httpx_wrapper import HttpxWrapper
+
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path == "/1/devices":
+            return httpx.Response(200, json=DEVICES, headers={"X-Rate-Limit-Remaining": "29"})
+        return httpx.Response(400, json={"code": 400001, "message": "Bad Request"})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        api = NatureRemoAPIVer1(HttpxWrapper(client), "token")
+        devices = await api.get_devices()
+        assert devices[0].id == "device-1"
+        assert api.rate_limit.remaining == 29
+        with pytest.raises(NatureRemoError, match="400001"):
+            await api.send_signal("signal-1")
+    assert requests[1].content == b""
+    assert requests[0].headers["Authorization"] == "Bearer token"